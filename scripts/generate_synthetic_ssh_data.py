@@ -6,6 +6,7 @@ Generates 10,000 realistic SSH events using existing database schema
 
 import random
 import pymysql
+from operator import itemgetter
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 import sys
@@ -101,6 +102,32 @@ MALICIOUS_LOCATIONS = [
     ('Unknown', 'Unknown', None, None, None),
 ]
 
+# raw_event_data payloads rendered once; per-event fields filled with %-formatting
+# (output is identical to json.dumps of the equivalent dict)
+SUCCESS_EVENT_DATA = [
+    json.dumps({
+        'event_type': 'successful_login',
+        'authentication_method': method,
+        'client_version': f'SSH-2.0-OpenSSH_{version}'
+    })
+    for method in ['password', 'publickey', 'keyboard-interactive']
+    for version in ["7.4", "8.0", "8.2", "9.0"]
+]
+
+FAILED_EVENT_DATA = [
+    json.dumps({
+        'event_type': 'failed_login',
+        'authentication_method': 'password',
+        'client_version': f'SSH-2.0-libssh_{version}'
+    })
+    for version in ["0.8", "0.9", "1.0"]
+]
+
+BRUTE_FORCE_EVENT_TEMPLATE = (
+    '{"event_type": "brute_force_attempt", '
+    '"attack_pattern": "credential_stuffing", "attempt_number": %d}'
+)
+
 class SyntheticSSHDataGenerator:
     def __init__(self):
         self.connection = None
@@ -140,12 +167,6 @@ class SyntheticSSHDataGenerator:
         server = random.choice(SERVERS)
         country, city, lat, lon, tz = self.get_geo_data(is_malicious)
 
-        event_data = {
-            'event_type': 'successful_login',
-            'authentication_method': random.choice(['password', 'publickey', 'keyboard-interactive']),
-            'client_version': f'SSH-2.0-OpenSSH_{random.choice(["7.4", "8.0", "8.2", "9.0"])}'
-        }
-
         return {
             'timestamp': timestamp,
             'server_hostname': server,
@@ -153,7 +174,7 @@ class SyntheticSSHDataGenerator:
             'username': username,
             'port': 22,
             'session_duration': session_duration,
-            'raw_event_data': json.dumps(event_data),
+            'raw_event_data': random.choice(SUCCESS_EVENT_DATA),
             'country': country,
             'city': city,
             'latitude': lat,
@@ -190,12 +211,6 @@ class SyntheticSSHDataGenerator:
         server = random.choice(SERVERS)
         country, city, lat, lon, tz = self.get_geo_data(is_attack)
 
-        event_data = {
-            'event_type': 'failed_login',
-            'authentication_method': 'password',
-            'client_version': f'SSH-2.0-libssh_{random.choice(["0.8", "0.9", "1.0"])}'
-        }
-
         return {
             'timestamp': timestamp,
             'server_hostname': server,
@@ -203,7 +218,7 @@ class SyntheticSSHDataGenerator:
             'username': username,
             'port': 22,
             'failure_reason': failure_reason,
-            'raw_event_data': json.dumps(event_data),
+            'raw_event_data': random.choice(FAILED_EVENT_DATA),
             'country': country,
             'city': city,
             'latitude': lat,
@@ -228,25 +243,28 @@ class SyntheticSSHDataGenerator:
         target_server = random.choice(SERVERS)
         attempts = random.randint(15, 50)
 
+        # Draw all per-attempt randomness up front instead of inside the loop
+        use_dictionary = random.choices((True, False), cum_weights=(0.4, 1.0), k=attempts)
+        dictionary_users = random.choices(MALICIOUS_USERNAMES, k=attempts)
+        user_numbers = random.choices(range(1, 101), k=attempts)
+        intervals = random.choices(range(2, 16), k=attempts)
+        locations = random.choices(MALICIOUS_LOCATIONS, k=attempts)
+        failure_reasons = random.choices(('invalid_password', 'invalid_user'), k=attempts)
+        ml_offsets = random.choices(range(0, 11), k=attempts)
+
         base_risk = 50
         for i in range(attempts):
             # Escalating risk score
             risk_score = min(95, base_risk + (i * 2))
 
             # Vary usernames (credential stuffing pattern)
-            if random.random() < 0.4:
-                username = random.choice(MALICIOUS_USERNAMES)
+            if use_dictionary[i]:
+                username = dictionary_users[i]
             else:
-                username = f"user{random.randint(1, 100)}"
+                username = "user%d" % user_numbers[i]
 
-            event_time = timestamp + timedelta(seconds=i * random.randint(2, 15))
-            country, city, lat, lon, tz = self.get_geo_data(True)
-
-            event_data = {
-                'event_type': 'brute_force_attempt',
-                'attack_pattern': 'credential_stuffing',
-                'attempt_number': i + 1
-            }
+            event_time = timestamp + timedelta(seconds=i * intervals[i])
+            country, city, lat, lon, tz = locations[i]
 
             events.append({
                 'timestamp': event_time,
@@ -254,8 +272,8 @@ class SyntheticSSHDataGenerator:
                 'source_ip': attacker_ip,
                 'username': username,
                 'port': 22,
-                'failure_reason': random.choice(['invalid_password', 'invalid_user']),
-                'raw_event_data': json.dumps(event_data),
+                'failure_reason': failure_reasons[i],
+                'raw_event_data': BRUTE_FORCE_EVENT_TEMPLATE % (i + 1),
                 'country': country,
                 'city': city,
                 'latitude': lat,
@@ -265,7 +283,7 @@ class SyntheticSSHDataGenerator:
                 'ip_risk_score': risk_score,
                 'ip_reputation': 'malicious',
                 'ip_health_processed': 1,
-                'ml_risk_score': risk_score + random.randint(0, 10),
+                'ml_risk_score': risk_score + ml_offsets[i],
                 'ml_threat_type': 'brute_force',
                 'ml_confidence': round(random.uniform(0.85, 0.99), 3),
                 'is_anomaly': 1,
@@ -282,19 +300,22 @@ class SyntheticSSHDataGenerator:
         target_user = random.choice(['root', 'admin', 'administrator'])
         num_attackers = random.randint(5, 15)
 
+        # Payload is the same for every attempt in this attack
+        raw_event_data = json.dumps({
+            'event_type': 'distributed_attack',
+            'attack_pattern': 'coordinated',
+            'target_user': target_user
+        })
+
         for _ in range(num_attackers):
             attacker_ip = random.choice(MALICIOUS_IPS)
             attempts = random.randint(3, 10)
+            offsets = random.choices(range(0, 61), k=attempts)
+            locations = random.choices(MALICIOUS_LOCATIONS, k=attempts)
 
             for i in range(attempts):
-                event_time = timestamp + timedelta(minutes=random.randint(0, 60))
-                country, city, lat, lon, tz = self.get_geo_data(True)
-
-                event_data = {
-                    'event_type': 'distributed_attack',
-                    'attack_pattern': 'coordinated',
-                    'target_user': target_user
-                }
+                event_time = timestamp + timedelta(minutes=offsets[i])
+                country, city, lat, lon, tz = locations[i]
 
                 events.append({
                     'timestamp': event_time,
@@ -303,7 +324,7 @@ class SyntheticSSHDataGenerator:
                     'username': target_user,
                     'port': 22,
                     'failure_reason': 'invalid_password',
-                    'raw_event_data': json.dumps(event_data),
+                    'raw_event_data': raw_event_data,
                     'country': country,
                     'city': city,
                     'latitude': lat,
@@ -349,8 +370,9 @@ class SyntheticSSHDataGenerator:
 
         # Generate successful legitimate logins
         print(f"\n✅ Generating {counts['successful_legit']} successful legitimate logins...")
+        gaps = random.choices(range(5, 31), k=counts['successful_legit'])
         for i in range(counts['successful_legit']):
-            current_time += timedelta(minutes=random.randint(5, 30))
+            current_time += timedelta(minutes=gaps[i])
             successful_events.append(self.generate_successful_login(current_time, False))
             if (i + 1) % 500 == 0:
                 print(f"   Progress: {i + 1}/{counts['successful_legit']}")
@@ -363,14 +385,16 @@ class SyntheticSSHDataGenerator:
 
         # Generate failed legitimate attempts
         print(f"\n❌ Generating {counts['failed_legit']} failed legitimate attempts...")
+        gaps = random.choices(range(10, 61), k=counts['failed_legit'])
         for i in range(counts['failed_legit']):
-            current_time += timedelta(minutes=random.randint(10, 60))
+            current_time += timedelta(minutes=gaps[i])
             failed_events.append(self.generate_failed_login(current_time, False))
 
         # Generate simple failed attacks
         print(f"\n⚔️  Generating {counts['failed_attack']} simple failed attacks...")
+        gaps = random.choices(range(5, 31), k=counts['failed_attack'])
         for i in range(counts['failed_attack']):
-            current_time += timedelta(minutes=random.randint(5, 30))
+            current_time += timedelta(minutes=gaps[i])
             failed_events.append(self.generate_failed_login(current_time, True))
             if (i + 1) % 500 == 0:
                 print(f"   Progress: {i + 1}/{counts['failed_attack']}")
@@ -391,9 +415,10 @@ class SyntheticSSHDataGenerator:
             current_time += timedelta(hours=random.randint(6, 24))
             failed_events.extend(self.generate_distributed_attack(current_time))
 
-        # Sort by timestamp
-        successful_events.sort(key=lambda x: x['timestamp'])
-        failed_events.sort(key=lambda x: x['timestamp'])
+        # Sort by timestamp (itemgetter keeps key extraction in C)
+        by_timestamp = itemgetter('timestamp')
+        successful_events.sort(key=by_timestamp)
+        failed_events.sort(key=by_timestamp)
 
         print(f"\n✅ Generated:")
         print(f"   Successful logins: {len(successful_events)}")
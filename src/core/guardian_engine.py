@@ -159,7 +159,7 @@ class GuardianEngine:
 
             # 3. Brute Force Detection
             logger.debug(f"Checking for brute force patterns")
-            brute_force_result = self.brute_force_detector.analyze_event(event)
+            brute_force_result = self.brute_force_detector.analyze_event(event).to_dict()
             result['analysis']['brute_force_detection'] = brute_force_result
 
             if brute_force_result['is_brute_force_attack']:
@@ -556,8 +556,8 @@ function renderCompactIntel(intel) {
         html += `
             <div class="col-12">
                 <strong class="text-info"><i class="fas fa-server"></i> Shodan:</strong>
-                ${shodan.port_count} ports
-                ${shodan.vulnerability_count > 0 ? ` | <span class="text-danger">${shodan.vulnerability_count} vulns</span>` : ''}
+                ${(shodan.open_ports || []).length} ports
+                ${(shodan.vulnerabilities || []).length > 0 ? ` | <span class="text-danger">${shodan.vulnerabilities.length} vulns</span>` : ''}
                 ${shodan.location ? ` | ${shodan.location.country}` : ''}
             </div>
         `;
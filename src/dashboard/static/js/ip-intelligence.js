@@ -261,11 +261,11 @@ class IPIntelligence {
                 <div class="shodan-stats">
                     <div class="stat-item">
                         <span class="stat-label">Open Ports:</span>
-                        <span class="stat-value">${sourceData.port_count || 0}</span>
+                        <span class="stat-value">${(sourceData.open_ports || []).length}</span>
                     </div>
                     <div class="stat-item">
                         <span class="stat-label">Vulnerabilities:</span>
-                        <span class="stat-value text-danger">${sourceData.vulnerability_count || 0}</span>
+                        <span class="stat-value text-danger">${(sourceData.vulnerabilities || []).length}</span>
                     </div>
                 </div>
                 ${sourceData.open_ports && sourceData.open_ports.length > 0 ? `
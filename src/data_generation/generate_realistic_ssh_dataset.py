@@ -3,6 +3,7 @@ import json
 from datetime import datetime, timedelta
 import ipaddress
 import os
+from operator import itemgetter
 
 class RealisticSSHDatasetGenerator:
     def __init__(self):
@@ -22,14 +23,19 @@ class RealisticSSHDatasetGenerator:
         network = ipaddress.IPv4Network(random.choice(ranges))
         return str(random.choice(list(network.hosts())))
     
-    def generate_realistic_event(self):
-        """Generate events with overlapping normal/attack patterns"""
-        timestamp = datetime.now() - timedelta(
+    def random_timestamp(self, now=None):
+        """Random timestamp within the last ~30 days"""
+        return (now or datetime.now()) - timedelta(
             days=random.randint(0, 30),
             hours=random.randint(0, 23),
             minutes=random.randint(0, 59),
             seconds=random.randint(0, 59)
         )
+
+    def generate_realistic_event(self, timestamp=None):
+        """Generate events with overlapping normal/attack patterns"""
+        if timestamp is None:
+            timestamp = self.random_timestamp()
         
         # Create ambiguous scenarios
         scenario = random.choice([
@@ -132,7 +138,7 @@ class RealisticSSHDatasetGenerator:
                 print(f"   Generated: {i:,} / {num_samples:,}")
         
         # Sort by timestamp
-        events.sort(key=lambda x: x['timestamp'])
+        events.sort(key=itemgetter('timestamp'))
         
         # Statistics
         normal_count = sum(1 for e in events if not e['is_suspicious'])
@@ -144,6 +150,43 @@ class RealisticSSHDatasetGenerator:
         
         return events
     
+    def stream_dataset(self, num_samples=20000, filename="realistic_ssh_dataset.json"):
+        """
+        Generate and write a dataset without holding all events in memory
+
+        Timestamps are drawn and sorted up front, so events come out in
+        order and each one is written to disk as soon as it is generated.
+        """
+        output_path = f"data/training_datasets/{filename}"
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        print(f"🔄 Streaming {num_samples:,} REALISTIC SSH events to {output_path}...")
+
+        now = datetime.now()
+        timestamps = sorted(self.random_timestamp(now) for _ in range(num_samples))
+
+        attack_count = 0
+        with open(output_path, 'w') as f:
+            f.write('[')
+            for i, timestamp in enumerate(timestamps):
+                event = self.generate_realistic_event(timestamp)
+                attack_count += event['is_suspicious']
+                f.write(',\n' if i else '\n')
+                f.write(json.dumps(event))
+
+                if i % 2000 == 0:
+                    print(f"   Generated: {i:,} / {num_samples:,}")
+            f.write('\n]\n')
+
+        normal_count = num_samples - attack_count
+        print(f"✅ Generated {num_samples:,} realistic events")
+        if num_samples:
+            print(f"   📊 Normal: {normal_count:,} ({normal_count/num_samples*100:.1f}%)")
+            print(f"   ⚠️  Suspicious: {attack_count:,} ({attack_count/num_samples*100:.1f}%)")
+        print(f"💾 Realistic dataset saved: {output_path}")
+
+        return output_path
+
     def save_dataset(self, events, filename="realistic_ssh_dataset.json"):
         """Save realistic dataset"""
         output_path = f"data/training_datasets/{filename}"
@@ -158,11 +201,8 @@ class RealisticSSHDatasetGenerator:
 if __name__ == "__main__":
     generator = RealisticSSHDatasetGenerator()
     
-    # Generate 20K more challenging samples
-    events = generator.generate_realistic_dataset(20000)
-    
-    # Save dataset
-    generator.save_dataset(events, "realistic_ssh_20k.json")
+    # Generate 20K more challenging samples, written straight to disk
+    generator.stream_dataset(20000, "realistic_ssh_20k.json")
     
     print("\n🎯 Realistic dataset created!")
     print("This should give 85-92% accuracy (not 100%)")
\ No newline at end of file
@@ -1,6 +1,6 @@
 """
 Detection Module
 """
-from .brute_force_detector import BruteForceDetectionEngine
+from .brute_force_detector import BruteForceDetectionEngine, DetectionResult
 
-__all__ = ['BruteForceDetectionEngine']
+__all__ = ['BruteForceDetectionEngine', 'DetectionResult']
@@ -3,14 +3,167 @@ AbuseIPDB API Client
 Provides IP abuse reports and confidence scores
 """
 
+import ipaddress
 import logging
-from typing import Dict, Optional, List
+from bisect import bisect_right
+from typing import Any, Dict, Optional, List
 from pathlib import Path
 from datetime import datetime, timedelta
-from .base_client import BaseIntelligenceClient
+from .base_client import BaseIntelligenceClient, error_text
+from .cache import IntelligenceCache
+from . import serialization
+
+try:
+    import msgspec
+except ImportError:  # optional: typed decoding of /check responses
+    msgspec = None
 
 logger = logging.getLogger(__name__)
 
+# Lower bounds of each threat level above 'clean', by abuse confidence score
+_THRESHOLDS = (10, 30, 60, 80)
+_LEVELS = ('clean', 'low', 'medium', 'high', 'critical')
+
+# AbuseIPDB report category IDs (1-23) mapped to their query-string form
+_CATEGORY_STR = {i: str(i) for i in range(1, 24)}
+
+# Usage types flagged as a threat indicator, with their pre-rendered text
+_RISKY_USAGE_TYPES = frozenset({'Data Center/Web Hosting/Transit', 'Fixed Line ISP'})
+_USAGE_INDICATOR = {usage: f"Usage type: {usage}" for usage in _RISKY_USAGE_TYPES}
+
+
+def _is_valid_public_ip(ip: str) -> bool:
+    """Check that ip is a well-formed, globally routable IPv4/IPv6 address"""
+    try:
+        return ipaddress.ip_address(ip).is_global
+    except ValueError:
+        return False
+
+
+if msgspec is not None:
+    class _CheckData(msgspec.Struct):
+        """Fields of a /check response's 'data' object; others are skipped"""
+        ipAddress: Optional[str] = 'Unknown'
+        isPublic: Optional[bool] = False
+        ipVersion: Optional[int] = 4
+        isWhitelisted: Optional[bool] = False
+        abuseConfidenceScore: Optional[int] = 0
+        countryCode: Optional[str] = 'Unknown'
+        countryName: Optional[str] = 'Unknown'
+        usageType: Optional[str] = 'Unknown'
+        isp: Optional[str] = 'Unknown'
+        domain: Optional[str] = 'Unknown'
+        hostnames: Optional[List[str]] = []
+        tor: Optional[bool] = False
+        totalReports: Optional[int] = 0
+        numDistinctUsers: Optional[int] = 0
+        lastReportedAt: Optional[str] = None
+        reports: List[Dict[str, Any]] = []
+
+    class _CheckResponse(msgspec.Struct):
+        data: _CheckData = msgspec.field(default_factory=_CheckData)
+
+    _check_decoder = msgspec.json.Decoder(_CheckResponse)
+
+
+def _decode_check(content: bytes) -> Dict[str, Any]:
+    """
+    Decode a /check body straight into the declared fields
+
+    Falls back to plain JSON decoding if the payload doesn't match the
+    expected types, so an API change degrades to the dict path.
+    """
+    try:
+        response = _check_decoder.decode(content)
+    except msgspec.ValidationError:
+        return serialization.loads(content)
+    return {'data': msgspec.structs.asdict(response.data)}
+
+
+def _normalize_check_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize the 'data' object of a /check response
+
+    Kept free of self/logging and fully annotated so it can be compiled
+    with mypyc for bulk re-parsing.
+
+    Args:
+        data: The response's 'data' object
+
+    Returns:
+        Parsed and normalized data
+    """
+    # Extract values the threat assessment below depends on
+    ip_address: str = data.get('ipAddress', 'Unknown')
+    is_whitelisted: bool = data.get('isWhitelisted', False)
+    abuse_confidence_score: int = data.get('abuseConfidenceScore', 0)
+    usage_type: str = data.get('usageType', 'Unknown')
+    total_reports: int = data.get('totalReports', 0)
+    num_distinct_users: int = data.get('numDistinctUsers', 0)
+
+    # Extract detailed reports (if available)
+    reports: List[Dict[str, Any]] = [
+        {
+            'reported_at': report.get('reportedAt'),
+            'comment': (report.get('comment') or '')[:200],  # First 200 chars
+            'categories': report.get('categories', []),
+            'reporter_id': report.get('reporterId'),
+            'reporter_country': report.get('reporterCountryCode')
+        }
+        for report in data.get('reports', [])[:10]  # Top 10 most recent
+    ]
+
+    # Determine threat status
+    is_threat = abuse_confidence_score >= 25  # 25% threshold
+
+    # Determine threat level
+    threat_level = _LEVELS[bisect_right(_THRESHOLDS, abuse_confidence_score)]
+
+    # Build threat indicators
+    threat_indicators: List[str] = [
+        indicator for indicator in (
+            f"{total_reports} abuse reports from {num_distinct_users} users"
+            if total_reports > 0 else None,
+            "IP is whitelisted" if is_whitelisted else None,
+            _USAGE_INDICATOR.get(usage_type)
+        )
+        if indicator is not None
+    ]
+
+    # Remaining fields are copied straight from the response
+    return {
+        'service': 'abuseipdb',
+        'ip_address': ip_address,
+        'is_public': data.get('isPublic', False),
+        'ip_version': data.get('ipVersion', 4),
+        'is_whitelisted': is_whitelisted,
+        'abuse_confidence_score': abuse_confidence_score,
+        'threat_score': abuse_confidence_score,  # Already 0-100
+        'threat_level': threat_level,
+        'is_threat': is_threat,
+        'location': {
+            'country_code': data.get('countryCode', 'Unknown'),
+            'country_name': data.get('countryName', 'Unknown')
+        },
+        'network_info': {
+            'usage_type': usage_type,
+            'isp': data.get('isp', 'Unknown'),
+            'domain': data.get('domain', 'Unknown'),
+            'hostnames': data.get('hostnames', []),
+            'tor': data.get('tor', False)
+        },
+        'report_stats': {
+            'total_reports': total_reports,
+            'distinct_reporters': num_distinct_users,
+            'last_reported_at': data.get('lastReportedAt')
+        },
+        'recent_reports': reports,
+        'threat_indicators': threat_indicators
+    }
+
+
+_CHECK_DECODER = _decode_check if msgspec is not None else None
+
 
 class AbuseIPDBClient(BaseIntelligenceClient):
     """
@@ -20,7 +173,9 @@ class AbuseIPDBClient(BaseIntelligenceClient):
     API docs: https://docs.abuseipdb.com/
     """
 
-    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600):
+    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600,
+                 clean_cache_ttl: int = 21600, cache: Optional[IntelligenceCache] = None,
+                 debug: bool = False):
         """
         Initialize AbuseIPDB client
 
@@ -28,13 +183,20 @@ class AbuseIPDBClient(BaseIntelligenceClient):
             api_key: AbuseIPDB API key
             cache_dir: Directory for caching responses
             cache_ttl: Cache time-to-live in seconds (default: 1 hour)
+            clean_cache_ttl: Cache time-to-live for IPs with no abuse reports
+                (default: 6 hours)
+            cache: Shared cache to use instead of one in cache_dir
+            debug: Include the raw API response in parse errors
         """
-        super().__init__(api_key, cache_dir, cache_ttl)
+        super().__init__(api_key, cache_dir, cache_ttl, cache=cache)
+        self.clean_cache_ttl = clean_cache_ttl
+        self.debug = debug
         self.base_url = "https://api.abuseipdb.com/api/v2"
         self.min_request_interval = 1.0  # Be respectful with API
         logger.info("AbuseIPDB client initialized")
 
-    def lookup(self, ip_address: str, use_cache: bool = True, max_age_days: int = 90) -> Dict:
+    def lookup(self, ip_address: str, use_cache: bool = True, max_age_days: int = 90,
+               include_reports: bool = True) -> Dict:
         """
         Look up IP address in AbuseIPDB
 
@@ -42,47 +204,127 @@ class AbuseIPDBClient(BaseIntelligenceClient):
             ip_address: IP address to query
             use_cache: Whether to use cached data
             max_age_days: Maximum age of reports to include (default: 90 days)
+            include_reports: Request the verbose payload with individual reports;
+                callers that only need scores should pass False
+                (recent_reports is then empty)
 
         Returns:
             Dictionary with AbuseIPDB analysis results
         """
-        cache_key = f"abuseipdb_{ip_address}_{max_age_days}"
+        if not _is_valid_public_ip(ip_address):
+            return {'error': 'invalid_ip', 'service': 'abuseipdb', 'ip_address': ip_address}
 
-        # Check cache first
+        cache_key = self._lookup_cache_key(ip_address, max_age_days, include_reports)
+
+        # Check cache first; keep an expired entry for a conditional refresh
+        stale = None
         if use_cache:
             cached = self._get_cached(cache_key)
             if cached:
                 return cached
+            stale = self._get_stale_cache(cache_key)
 
         # Make API request
+        url, headers, params = self._check_request(ip_address, max_age_days, include_reports)
+        response, validators = self._fetch(
+            url, self._conditional_headers(headers, stale), params, decoder=_CHECK_DECODER
+        )
+        return self._handle_check_response(response, validators, cache_key, use_cache, stale)
+
+    async def lookup_async(self, ip_address: str, use_cache: bool = True,
+                           max_age_days: int = 90, include_reports: bool = True) -> Dict:
+        """
+        Async variant of lookup(), for overlapping with other intel services
+
+        Args:
+            ip_address: IP address to query
+            use_cache: Whether to use cached data
+            max_age_days: Maximum age of reports to include (default: 90 days)
+            include_reports: Request the verbose payload with individual reports;
+                callers that only need scores should pass False
+                (recent_reports is then empty)
+
+        Returns:
+            Dictionary with AbuseIPDB analysis results
+        """
+        if not _is_valid_public_ip(ip_address):
+            return {'error': 'invalid_ip', 'service': 'abuseipdb', 'ip_address': ip_address}
+
+        cache_key = self._lookup_cache_key(ip_address, max_age_days, include_reports)
+
+        stale = None
+        if use_cache:
+            cached = self._get_cached(cache_key)
+            if cached:
+                return cached
+            stale = self._get_stale_cache(cache_key)
+
+        url, headers, params = self._check_request(ip_address, max_age_days, include_reports)
+        response, validators = await self._fetch_async(
+            url, self._conditional_headers(headers, stale), params, decoder=_CHECK_DECODER
+        )
+        return self._handle_check_response(response, validators, cache_key, use_cache, stale)
+
+    @staticmethod
+    def _lookup_cache_key(ip_address: str, max_age_days: int = 90,
+                          include_reports: bool = True) -> str:
+        """Cache key for a /check lookup; brief lookups are cached separately"""
+        if include_reports:
+            return f"abuseipdb_{ip_address}_{max_age_days}"
+        return f"abuseipdb_{ip_address}_{max_age_days}_brief"
+
+    def _check_request(self, ip_address: str, max_age_days: int, include_reports: bool = True):
+        """Build (url, headers, params) for a /check request"""
         url = f"{self.base_url}/check"
-        headers = {
-            "Key": self.api_key,
-            "Accept": "application/json"
-        }
+        headers = {"Key": self.api_key}
         params = {
             'ipAddress': ip_address,
-            'maxAgeInDays': max_age_days,
-            'verbose': ''  # Include detailed report data
+            'maxAgeInDays': max_age_days
         }
-
-        response = self._make_request(url, headers=headers, params=params)
+        if include_reports:
+            params['verbose'] = ''  # Include detailed report data
+        return url, headers, params
+
+    def _handle_check_response(self, response: Dict, validators: Optional[Dict], cache_key: str,
+                               use_cache: bool, stale: Optional[Dict] = None) -> Dict:
+        """Parse and cache a /check response, or return its error information"""
+        if response.get('not_modified') and stale:
+            # 304: the expired entry is still current, just extend its lifetime
+            self._save_cache(cache_key, stale['data'], {
+                'etag': validators.get('etag') or stale.get('etag'),
+                'last_modified': validators.get('last_modified') or stale.get('last_modified')
+            }, ttl=self._result_ttl(stale['data']))
+            return stale['data']
 
         if response and not response.get('error'):
             result = self._parse_response(response)
 
-            # Cache successful response
+            # Cache successful response; a parse error only as briefly as other errors
             if use_cache:
-                self._save_cache(cache_key, result)
+                if result.get('error'):
+                    self._save_cache(cache_key, result, ttl=self.negative_cache_ttl)
+                else:
+                    self._save_cache(cache_key, result, validators, ttl=self._result_ttl(result))
 
             return result
         else:
-            # Return error information
-            return {
+            # Return error information; an expired entry is kept instead for
+            # its validators
+            error = {
                 'error': response.get('error', 'Unknown error'),
                 'status_code': response.get('status_code'),
                 'service': 'abuseipdb'
             }
+            if use_cache and not stale:
+                self._save_error(cache_key, error)
+            return error
+
+    def _result_ttl(self, result: Dict) -> Optional[int]:
+        """Cache lifetime for a parsed result: longer for IPs nobody has reported"""
+        total_reports = result.get('report_stats', {}).get('total_reports')
+        if result.get('abuse_confidence_score') == 0 and not total_reports:
+            return self.clean_cache_ttl
+        return None
 
     def _parse_response(self, response: Dict) -> Dict:
         """
@@ -95,112 +337,25 @@ class AbuseIPDBClient(BaseIntelligenceClient):
             Parsed and normalized data
         """
         try:
-            data = response.get('data', {})
-
-            # Extract basic information
-            ip_address = data.get('ipAddress', 'Unknown')
-            is_public = data.get('isPublic', False)
-            ip_version = data.get('ipVersion', 4)
-            is_whitelisted = data.get('isWhitelisted', False)
-
-            # Extract abuse metrics
-            abuse_confidence_score = data.get('abuseConfidenceScore', 0)
-            country_code = data.get('countryCode', 'Unknown')
-            country_name = data.get('countryName', 'Unknown')
-            usage_type = data.get('usageType', 'Unknown')
-            isp = data.get('isp', 'Unknown')
-            domain = data.get('domain', 'Unknown')
-            hostnames = data.get('hostnames', [])
-            tor = data.get('tor', False)
-
-            # Extract report statistics
-            total_reports = data.get('totalReports', 0)
-            num_distinct_users = data.get('numDistinctUsers', 0)
-            last_reported_at = data.get('lastReportedAt')
-
-            # Extract detailed reports (if available)
-            reports = []
-            for report in data.get('reports', [])[:10]:  # Top 10 most recent
-                reports.append({
-                    'reported_at': report.get('reportedAt'),
-                    'comment': report.get('comment', '')[:200],  # First 200 chars
-                    'categories': report.get('categories', []),
-                    'reporter_id': report.get('reporterId'),
-                    'reporter_country': report.get('reporterCountryCode')
-                })
-
-            # Determine threat status
-            is_threat = abuse_confidence_score >= 25  # 25% threshold
-            threat_score = abuse_confidence_score  # Already 0-100
-
-            # Determine threat level
-            if abuse_confidence_score >= 80:
-                threat_level = 'critical'
-            elif abuse_confidence_score >= 60:
-                threat_level = 'high'
-            elif abuse_confidence_score >= 30:
-                threat_level = 'medium'
-            elif abuse_confidence_score >= 10:
-                threat_level = 'low'
-            else:
-                threat_level = 'clean'
-
-            # Build threat indicators
-            threat_indicators = []
-            if total_reports > 0:
-                threat_indicators.append(
-                    f"{total_reports} abuse reports from {num_distinct_users} users"
-                )
-            if is_whitelisted:
-                threat_indicators.append("IP is whitelisted")
-            if usage_type in ['Data Center/Web Hosting/Transit', 'Fixed Line ISP']:
-                threat_indicators.append(f"Usage type: {usage_type}")
-
-            parsed = {
-                'service': 'abuseipdb',
-                'ip_address': ip_address,
-                'is_public': is_public,
-                'ip_version': ip_version,
-                'is_whitelisted': is_whitelisted,
-                'abuse_confidence_score': abuse_confidence_score,
-                'threat_score': threat_score,
-                'threat_level': threat_level,
-                'is_threat': is_threat,
-                'location': {
-                    'country_code': country_code,
-                    'country_name': country_name
-                },
-                'network_info': {
-                    'usage_type': usage_type,
-                    'isp': isp,
-                    'domain': domain,
-                    'hostnames': hostnames,
-                    'tor': tor
-                },
-                'report_stats': {
-                    'total_reports': total_reports,
-                    'distinct_reporters': num_distinct_users,
-                    'last_reported_at': last_reported_at
-                },
-                'recent_reports': reports,
-                'threat_indicators': threat_indicators
-            }
+            parsed = _normalize_check_data(response.get('data', {}))
 
             logger.info(
-                f"AbuseIPDB: {ip_address} - "
-                f"Confidence: {abuse_confidence_score}%, "
-                f"Reports: {total_reports}"
+                f"AbuseIPDB: {parsed['ip_address']} - "
+                f"Confidence: {parsed['abuse_confidence_score']}%, "
+                f"Reports: {parsed['report_stats']['total_reports']}"
             )
 
             return parsed
 
         except Exception as e:
-            logger.error(f"Error parsing AbuseIPDB response: {e}")
-            return {
-                'error': f'Parse error: {str(e)}',
-                'service': 'abuseipdb',
-                'raw_response': response
+            logger.error(f"Error parsing AbuseIPDB response: {error_text(e)}")
+            error = {
+                'error': f'Parse error: {error_text(e)}',
+                'service': 'abuseipdb'
             }
+            if self.debug:
+                error['raw_response'] = response
+            return error
 
     def report_ip(self, ip_address: str, categories: List[int], comment: str = "") -> Dict:
         """
@@ -234,14 +389,22 @@ class AbuseIPDBClient(BaseIntelligenceClient):
             22: SSH
             23: IoT Targeted
         """
+        if not _is_valid_public_ip(ip_address):
+            return {'success': False, 'error': 'invalid_ip', 'ip_address': ip_address}
+
+        invalid = set(categories).difference(_CATEGORY_STR)
+        if invalid:
+            return {
+                'success': False,
+                'error': f'Invalid category IDs: {sorted(invalid, key=str)}',
+                'ip_address': ip_address
+            }
+
         url = f"{self.base_url}/report"
-        headers = {
-            "Key": self.api_key,
-            "Accept": "application/json"
-        }
+        headers = {"Key": self.api_key}
         params = {
             'ip': ip_address,
-            'categories': ','.join(map(str, categories)),
+            'categories': ','.join([_CATEGORY_STR[c] for c in categories]),
             'comment': comment
         }
 
@@ -273,10 +436,7 @@ class AbuseIPDBClient(BaseIntelligenceClient):
             Dictionary with block analysis
         """
         url = f"{self.base_url}/check-block"
-        headers = {
-            "Key": self.api_key,
-            "Accept": "application/json"
-        }
+        headers = {"Key": self.api_key}
         params = {
             'network': network,
             'maxAgeInDays': max_age_days
@@ -314,10 +474,7 @@ class AbuseIPDBClient(BaseIntelligenceClient):
             Dictionary with blacklist data
         """
         url = f"{self.base_url}/blacklist"
-        headers = {
-            "Key": self.api_key,
-            "Accept": "application/json"
-        }
+        headers = {"Key": self.api_key}
         params = {
             'confidenceMinimum': confidence_minimum,
             'limit': limit
@@ -4,106 +4,227 @@ Supports: VirusTotal, AbuseIPDB, Shodan
 Includes: Rate limiting, caching, free tier optimization
 """
 
+import asyncio
 import requests
 import time
 import json
-import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
 import logging
+from bisect import bisect_right
+from operator import itemgetter
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # optional: native async lookups
+    httpx = None
+
+try:
+    import ijson
+except ImportError:  # optional: streaming Shodan host documents
+    ijson = None
+
+try:
+    import uvloop
+except ImportError:  # optional: lower-overhead event loop for batch sweeps
+    uvloop = None
+
+from . import serialization
+from .cache import IntelligenceCache
 
 logger = logging.getLogger(__name__)
 
 
-class APIRateLimiter:
-    """Rate limiter to respect API quotas"""
+# Aggregated score thresholds: score >= _THREAT_BOUNDS[i - 1] maps to
+# _THREAT_LEVELS[i], with matching recommendations
+_THREAT_BOUNDS = (20, 40, 60, 80)
+_THREAT_LEVELS = ('clean', 'low', 'medium', 'high', 'critical')
+_THREAT_RECOMMENDATIONS = (
+    (),
+    ('Standard monitoring',),
+    ('Increase monitoring for this IP',),
+    ('Monitor closely and consider blocking',),
+    ('Block IP immediately', 'Investigate all activity from this IP')
+)
 
-    def __init__(self, requests_per_day: int, requests_per_minute: int = None):
-        self.requests_per_day = requests_per_day
-        self.requests_per_minute = requests_per_minute or 60
-        self.daily_requests = []
-        self.minute_requests = []
+# VirusTotal always reports every analysis stat, so the counts are read with
+# a single itemgetter call and only partial documents fall back to .get()
+_VT_STAT_KEYS = ('malicious', 'suspicious', 'harmless', 'undetected')
+_vt_stat_counts = itemgetter(*_VT_STAT_KEYS)
 
-    def can_make_request(self) -> bool:
-        """Check if we can make a request without exceeding limits"""
-        now = datetime.now()
+# Top-level Shodan host fields ShodanClient._parse_response reads; banners
+# ('data') and other large subtrees are skipped when streaming
+_SHODAN_HOST_FIELDS = frozenset({
+    'ports', 'vulns', 'tags', 'hostnames', 'os', 'org', 'isp', 'asn',
+    'country_name', 'city', 'last_update'
+})
 
-        # Clean old requests
-        self.daily_requests = [ts for ts in self.daily_requests if now - ts < timedelta(days=1)]
-        self.minute_requests = [ts for ts in self.minute_requests if now - ts < timedelta(minutes=1)]
 
-        # Check limits
-        if len(self.daily_requests) >= self.requests_per_day:
-            logger.warning(f"Daily rate limit reached ({self.requests_per_day}/day)")
-            return False
+# Shodan host tags that mark an IP as hostile
+_SHODAN_BAD_TAGS = frozenset({'malware', 'compromised', 'tor'})
 
-        if len(self.minute_requests) >= self.requests_per_minute:
-            logger.warning(f"Minute rate limit reached ({self.requests_per_minute}/min)")
-            return False
 
-        return True
+def _parse_shodan_host(stream) -> Dict[str, Any]:
+    """
+    Incrementally parse a Shodan host document, building Python objects
+    only for the fields in _SHODAN_HOST_FIELDS
+    """
+    data = {}
+    events = ijson.parse(stream, use_float=True)
+    for prefix, event, value in events:
+        if event != 'map_key' or prefix != '' or value not in _SHODAN_HOST_FIELDS:
+            continue
+
+        key = value
+        builder = ijson.ObjectBuilder()
+        depth = 0
+        for _, event, value in events:
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+            if depth == 0:
+                break
+        data[key] = builder.value
+
+        if len(data) == len(_SHODAN_HOST_FIELDS):
+            break  # Everything needed has been read
+
+    return data
+
+
+def _new_session(headers: Dict[str, str] = None, params: Dict[str, str] = None) -> requests.Session:
+    """Create a keep-alive session whose auth headers/params go on every request"""
+    session = requests.Session()
+    session.headers.update(headers or {})
+    session.params.update(params or {})
+    return session
+
+
+def _new_async_client(headers: Dict[str, str] = None, params: Dict[str, str] = None):
+    """Create a keep-alive AsyncClient for one API host"""
+    return httpx.AsyncClient(
+        headers=headers,
+        params=params,
+        limits=httpx.Limits(max_keepalive_connections=20),
+        timeout=10
+    )
+
+
+def _rate_limited(response: Dict) -> Dict:
+    """Mark an empty response as skipped because no quota slot was free"""
+    response['status'] = 'rate_limited'
+    return response
+
+
+class TokenBucket:
+    """
+    Token bucket: holds up to `capacity` tokens, refilled continuously at
+    `rate` tokens per second. Constant time and memory per check.
+    """
 
-    def record_request(self):
-        """Record that a request was made"""
-        now = datetime.now()
-        self.daily_requests.append(now)
-        self.minute_requests.append(now)
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
 
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
 
-class IntelligenceCache:
-    """Persistent cache for API results to minimize requests"""
+    def available(self) -> bool:
+        """Check whether a token can be taken right now"""
+        self._refill()
+        return self.tokens >= 1
 
-    def __init__(self, cache_dir: Path, cache_ttl_hours: int = 24):
-        self.cache_dir = cache_dir
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_ttl = timedelta(hours=cache_ttl_hours)
+    def consume(self):
+        """Take one token"""
+        self._refill()
+        self.tokens -= 1
 
-    def _get_cache_key(self, api_name: str, query: str) -> str:
-        """Generate cache key"""
-        return hashlib.md5(f"{api_name}:{query}".encode()).hexdigest()
+    def wait_time(self) -> float:
+        """Seconds until a token will be available"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
 
-    def get(self, api_name: str, query: str) -> Optional[Dict]:
-        """Get cached result if available and fresh"""
-        cache_key = self._get_cache_key(api_name, query)
-        cache_file = self.cache_dir / f"{cache_key}.json"
 
-        if not cache_file.exists():
-            return None
+class APIRateLimiter:
+    """
+    Rate limiter to respect API quotas (a day window and a minute window)
 
-        try:
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
+    Both are strict sliding windows: no span of 24h (or 60s) ever holds
+    more grants than the quota, however the requests are spaced.
+    """
 
-            # Check if cache is still fresh
-            cached_time = datetime.fromisoformat(cached_data['cached_at'])
-            if datetime.now() - cached_time > self.cache_ttl:
-                cache_file.unlink()  # Remove stale cache
+    def __init__(self, requests_per_day: int, requests_per_minute: int = None):
+        self.requests_per_day = requests_per_day
+        self.requests_per_minute = requests_per_minute or 60
+        # Send times (monotonic) of the most recent grants, oldest first; only
+        # the last `limit` matter, so each window holds at most that many
+        self.daily_requests = deque(maxlen=self.requests_per_day)
+        self.minute_requests = deque(maxlen=self.requests_per_minute)
+        self._lock = threading.Lock()  # Makes check-and-take atomic across threads
+
+    @staticmethod
+    def _next_slot(grants: deque, period: float, now: float) -> float:
+        """Earliest time a new grant keeps every period-long span within the limit"""
+        if len(grants) < grants.maxlen:
+            return now
+        return max(now, grants[0] + period)
+
+    def _reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Check the quotas and take a slot in one step, so concurrent callers
+        can never all pass the check before any of them is counted
+
+        Returns:
+            Seconds to wait before sending, or None if no slot is free within max_wait
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            day_slot = self._next_slot(self.daily_requests, 86400, now)
+            if day_slot - now > max_wait:
+                logger.warning("Daily rate limit reached (%s/day)", self.requests_per_day)
                 return None
 
-            logger.debug(f"Cache hit for {api_name}:{query}")
-            return cached_data['result']
+            slot = max(day_slot, self._next_slot(self.minute_requests, 60, now))
+            if slot - now > max_wait:
+                logger.warning("Minute rate limit reached (%s/min)", self.requests_per_minute)
+                return None
 
-        except Exception as e:
-            logger.error(f"Cache read error: {e}")
-            return None
+            # Taken now, at its future send time: later callers queue behind it
+            self.daily_requests.append(slot)
+            self.minute_requests.append(slot)
+            return slot - now
 
-    def set(self, api_name: str, query: str, result: Dict):
-        """Store result in cache"""
-        cache_key = self._get_cache_key(api_name, query)
-        cache_file = self.cache_dir / f"{cache_key}.json"
+    def try_acquire(self) -> bool:
+        """Take a request slot if one is free right now (thread-safe)"""
+        return self._reserve(0.0) is not None
 
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'cached_at': datetime.now().isoformat(),
-                    'api': api_name,
-                    'query': query,
-                    'result': result
-                }, f)
-            logger.debug(f"Cached result for {api_name}:{query}")
-        except Exception as e:
-            logger.error(f"Cache write error: {e}")
+    async def acquire(self, max_wait: float = 0.0) -> bool:
+        """
+        Take a request slot, waiting up to max_wait seconds for one to
+        free up instead of failing straight away
+
+        Returns:
+            True if the request may be made (and has been recorded)
+        """
+        wait = self._reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
 
 
 class VirusTotalClient:
@@ -112,11 +233,31 @@ class VirusTotalClient:
     Free tier: 250 requests/day, 4 requests/minute
     """
 
+    _EMPTY_RESPONSE = {
+        'status': 'error',
+        'source': 'virustotal',
+        'malicious_count': 0,
+        'suspicious_count': 0,
+        'harmless_count': 0,
+        'total_scans': 0,
+        'detection_rate': 0,
+        'risk_score': 0,
+        'is_malicious': False
+    }
+
     def __init__(self, api_key: str, cache: IntelligenceCache):
         self.api_key = api_key
         self.cache = cache
         self.rate_limiter = APIRateLimiter(requests_per_day=250, requests_per_minute=4)
+        self.max_concurrency = self.rate_limiter.requests_per_minute  # In-flight cap for analyze_ips
         self.base_url = "https://www.virustotal.com/api/v3"
+        self._ip_url_prefix = f"{self.base_url}/ip_addresses/"
+        self._headers = {
+            "x-apikey": self.api_key,
+            "Accept": "application/json"
+        }
+        self.session = _new_session(headers=self._headers)
+        self._async_client = None  # Created on first check_ip_async
 
     def check_ip(self, ip_address: str) -> Dict[str, Any]:
         """
@@ -128,39 +269,69 @@ class VirusTotalClient:
         if cached:
             return cached
 
-        # Check rate limit
-        if not self.rate_limiter.can_make_request():
-            logger.warning(f"VirusTotal rate limit exceeded, skipping {ip_address}")
+        # Check rate limit (and take the slot)
+        if not self.rate_limiter.try_acquire():
+            logger.warning("VirusTotal rate limit exceeded, skipping %s", ip_address)
+            return _rate_limited(self._get_empty_response())
+
+        return self._fetch(ip_address)
+
+    def _fetch(self, ip_address: str) -> Dict[str, Any]:
+        """Send the request for a slot already taken from the rate limiter"""
+        try:
+            url = self._ip_url_prefix + ip_address
+            response = self.session.get(url, timeout=10)
+
+            return self._handle_response(ip_address, response)
+
+        except Exception as e:
+            logger.error("VirusTotal API exception: %s", e)
             return self._get_empty_response()
 
+    async def check_ip_async(self, ip_address: str, max_wait: float = 0.0) -> Dict[str, Any]:
+        """
+        Async variant of check_ip
+        Uses httpx when installed, otherwise runs the request in the default executor
+
+        Args:
+            max_wait: Seconds to wait for a rate-limit slot before giving up
+        """
+        cached = self.cache.get('virustotal', ip_address)
+        if cached:
+            return cached
+
+        if not await self.rate_limiter.acquire(max_wait):
+            logger.warning("VirusTotal rate limit exceeded, skipping %s", ip_address)
+            return _rate_limited(self._get_empty_response())
+
+        if httpx is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self._fetch, ip_address)
+
         try:
-            headers = {
-                "x-apikey": self.api_key,
-                "Accept": "application/json"
-            }
+            url = self._ip_url_prefix + ip_address
+            response = await self._get_async_client().get(url)
 
-            url = f"{self.base_url}/ip_addresses/{ip_address}"
-            response = requests.get(url, headers=headers, timeout=10)
-
-            self.rate_limiter.record_request()
-
-            if response.status_code == 200:
-                data = response.json()
-                result = self._parse_response(data)
-                self.cache.set('virustotal', ip_address, result)
-                return result
-            elif response.status_code == 404:
-                # IP not found in VT database
-                result = self._get_empty_response()
-                result['status'] = 'not_found'
-                self.cache.set('virustotal', ip_address, result)
-                return result
-            else:
-                logger.error(f"VirusTotal API error: {response.status_code}")
-                return self._get_empty_response()
+            return self._handle_response(ip_address, response)
 
         except Exception as e:
-            logger.error(f"VirusTotal API exception: {e}")
+            logger.error("VirusTotal API exception: %s", e)
+            return self._get_empty_response()
+
+    def _handle_response(self, ip_address: str, response) -> Dict[str, Any]:
+        """Turn a requests/httpx response into a result, caching it when useful"""
+        if response.status_code == 200:
+            data = serialization.loads(response.content)
+            result = self._parse_response(data)
+            self.cache.set('virustotal', ip_address, result)
+            return result
+        elif response.status_code == 404:
+            # IP not found in VT database
+            result = self._get_empty_response()
+            result['status'] = 'not_found'
+            self.cache.set('virustotal', ip_address, result)
+            return result
+        else:
+            logger.error("VirusTotal API error: %s", response.status_code)
             return self._get_empty_response()
 
     def _parse_response(self, data: Dict) -> Dict:
@@ -169,10 +340,12 @@ class VirusTotalClient:
             attributes = data.get('data', {}).get('attributes', {})
             last_analysis_stats = attributes.get('last_analysis_stats', {})
 
-            malicious = last_analysis_stats.get('malicious', 0)
-            suspicious = last_analysis_stats.get('suspicious', 0)
-            harmless = last_analysis_stats.get('harmless', 0)
-            undetected = last_analysis_stats.get('undetected', 0)
+            try:
+                malicious, suspicious, harmless, undetected = _vt_stat_counts(last_analysis_stats)
+            except KeyError:
+                malicious, suspicious, harmless, undetected = (
+                    last_analysis_stats.get(key, 0) for key in _VT_STAT_KEYS
+                )
 
             total_scans = malicious + suspicious + harmless + undetected
             detection_rate = (malicious + suspicious) / total_scans if total_scans > 0 else 0
@@ -198,22 +371,28 @@ class VirusTotalClient:
                 'last_analysis_date': attributes.get('last_analysis_date', None)
             }
         except Exception as e:
-            logger.error(f"VirusTotal response parse error: {e}")
+            logger.error("VirusTotal response parse error: %s", e)
             return self._get_empty_response()
 
+    def _get_async_client(self):
+        """Get this client's keep-alive AsyncClient, creating it on first use"""
+        if self._async_client is None:
+            self._async_client = _new_async_client(headers=self._headers)
+        return self._async_client
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async HTTP client, if one was created"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
     def _get_empty_response(self) -> Dict:
         """Return empty response structure"""
-        return {
-            'status': 'error',
-            'source': 'virustotal',
-            'malicious_count': 0,
-            'suspicious_count': 0,
-            'harmless_count': 0,
-            'total_scans': 0,
-            'detection_rate': 0,
-            'risk_score': 0,
-            'is_malicious': False
-        }
+        return self._EMPTY_RESPONSE.copy()
 
 
 class AbuseIPDBClient:
@@ -222,11 +401,28 @@ class AbuseIPDBClient:
     Free tier: 1000 requests/day
     """
 
+    _EMPTY_RESPONSE = {
+        'status': 'error',
+        'source': 'abuseipdb',
+        'abuse_confidence_score': 0,
+        'total_reports': 0,
+        'risk_score': 0,
+        'is_malicious': False
+    }
+
     def __init__(self, api_key: str, cache: IntelligenceCache):
         self.api_key = api_key
         self.cache = cache
         self.rate_limiter = APIRateLimiter(requests_per_day=1000, requests_per_minute=60)
+        self.max_concurrency = self.rate_limiter.requests_per_minute  # In-flight cap for analyze_ips
         self.base_url = "https://api.abuseipdb.com/api/v2"
+        self._check_url = f"{self.base_url}/check"
+        self._headers = {
+            "Key": self.api_key,
+            "Accept": "application/json"
+        }
+        self.session = _new_session(headers=self._headers)
+        self._async_client = None  # Created on first check_ip_async
 
     def check_ip(self, ip_address: str, max_age_days: int = 90) -> Dict[str, Any]:
         """
@@ -238,39 +434,78 @@ class AbuseIPDBClient:
         if cached:
             return cached
 
-        # Check rate limit
-        if not self.rate_limiter.can_make_request():
-            logger.warning(f"AbuseIPDB rate limit exceeded, skipping {ip_address}")
-            return self._get_empty_response()
+        # Check rate limit (and take the slot)
+        if not self.rate_limiter.try_acquire():
+            logger.warning("AbuseIPDB rate limit exceeded, skipping %s", ip_address)
+            return _rate_limited(self._get_empty_response())
 
+        return self._fetch(ip_address, max_age_days)
+
+    def _fetch(self, ip_address: str, max_age_days: int) -> Dict[str, Any]:
+        """Send the request for a slot already taken from the rate limiter"""
         try:
-            headers = {
-                "Key": self.api_key,
-                "Accept": "application/json"
+            params = {
+                "ipAddress": ip_address,
+                "maxAgeInDays": max_age_days,
+                "verbose": ""
             }
 
+            url = self._check_url
+            response = self.session.get(url, params=params, timeout=10)
+
+            return self._handle_response(ip_address, response)
+
+        except Exception as e:
+            logger.error("AbuseIPDB API exception: %s", e)
+            return self._get_empty_response()
+
+    async def check_ip_async(self, ip_address: str, max_age_days: int = 90,
+                             max_wait: float = 0.0) -> Dict[str, Any]:
+        """
+        Async variant of check_ip
+        Uses httpx when installed, otherwise runs the request in the default executor
+
+        Args:
+            max_wait: Seconds to wait for a rate-limit slot before giving up
+        """
+        cached = self.cache.get('abuseipdb', ip_address)
+        if cached:
+            return cached
+
+        if not await self.rate_limiter.acquire(max_wait):
+            logger.warning("AbuseIPDB rate limit exceeded, skipping %s", ip_address)
+            return _rate_limited(self._get_empty_response())
+
+        if httpx is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._fetch, ip_address, max_age_days
+            )
+
+        try:
             params = {
                 "ipAddress": ip_address,
                 "maxAgeInDays": max_age_days,
                 "verbose": ""
             }
 
-            url = f"{self.base_url}/check"
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-
-            self.rate_limiter.record_request()
+            url = self._check_url
+            response = await self._get_async_client().get(url, params=params)
 
-            if response.status_code == 200:
-                data = response.json()
-                result = self._parse_response(data)
-                self.cache.set('abuseipdb', ip_address, result)
-                return result
-            else:
-                logger.error(f"AbuseIPDB API error: {response.status_code}")
-                return self._get_empty_response()
+            return self._handle_response(ip_address, response)
 
         except Exception as e:
-            logger.error(f"AbuseIPDB API exception: {e}")
+            logger.error("AbuseIPDB API exception: %s", e)
+            return self._get_empty_response()
+
+    def _handle_response(self, ip_address: str, response) -> Dict[str, Any]:
+        """Turn a requests/httpx response into a result, caching it when useful"""
+        if response.status_code == 200:
+            data = serialization.loads(response.content)
+            result = self._parse_response(data)
+            self.cache.set('abuseipdb', ip_address, result)
+            return result
+        else:
+            logger.error("AbuseIPDB API error: %s", response.status_code)
             return self._get_empty_response()
 
     def _parse_response(self, data: Dict) -> Dict:
@@ -302,19 +537,28 @@ class AbuseIPDBClient:
                 'last_reported_at': ip_data.get('lastReportedAt', None)
             }
         except Exception as e:
-            logger.error(f"AbuseIPDB response parse error: {e}")
+            logger.error("AbuseIPDB response parse error: %s", e)
             return self._get_empty_response()
 
+    def _get_async_client(self):
+        """Get this client's keep-alive AsyncClient, creating it on first use"""
+        if self._async_client is None:
+            self._async_client = _new_async_client(headers=self._headers)
+        return self._async_client
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async HTTP client, if one was created"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
     def _get_empty_response(self) -> Dict:
         """Return empty response structure"""
-        return {
-            'status': 'error',
-            'source': 'abuseipdb',
-            'abuse_confidence_score': 0,
-            'total_reports': 0,
-            'risk_score': 0,
-            'is_malicious': False
-        }
+        return self._EMPTY_RESPONSE.copy()
 
 
 class ShodanClient:
@@ -323,11 +567,27 @@ class ShodanClient:
     Free tier: Limited queries, basic info only
     """
 
+    _EMPTY_RESPONSE = {
+        'status': 'error',
+        'source': 'shodan',
+        'open_ports': [],
+        'num_ports': 0,
+        'vulnerabilities': [],
+        'num_vulnerabilities': 0,
+        'risk_score': 0,
+        'is_malicious': False
+    }
+
     def __init__(self, api_key: str, cache: IntelligenceCache):
         self.api_key = api_key
         self.cache = cache
         self.rate_limiter = APIRateLimiter(requests_per_day=100, requests_per_minute=10)
+        self.max_concurrency = self.rate_limiter.requests_per_minute  # In-flight cap for analyze_ips
         self.base_url = "https://api.shodan.io"
+        self._host_url_prefix = f"{self.base_url}/shodan/host/"
+        self._params = {"key": self.api_key}
+        self.session = _new_session(params=self._params)
+        self._async_client = None  # Created on first check_ip_async
 
     def check_ip(self, ip_address: str) -> Dict[str, Any]:
         """
@@ -339,38 +599,81 @@ class ShodanClient:
         if cached:
             return cached
 
-        # Check rate limit
-        if not self.rate_limiter.can_make_request():
-            logger.warning(f"Shodan rate limit exceeded, skipping {ip_address}")
+        # Check rate limit (and take the slot)
+        if not self.rate_limiter.try_acquire():
+            logger.warning("Shodan rate limit exceeded, skipping %s", ip_address)
+            return _rate_limited(self._get_empty_response())
+
+        return self._fetch(ip_address)
+
+    def _fetch(self, ip_address: str) -> Dict[str, Any]:
+        """Send the request for a slot already taken from the rate limiter"""
+        try:
+            url = self._host_url_prefix + ip_address
+
+            # Stream the body so banners can be skipped without being parsed
+            with self.session.get(url, timeout=10, stream=ijson is not None) as response:
+                return self._handle_response(ip_address, response)
+
+        except Exception as e:
+            logger.error("Shodan API exception: %s", e)
             return self._get_empty_response()
 
+    async def check_ip_async(self, ip_address: str, max_wait: float = 0.0) -> Dict[str, Any]:
+        """
+        Async variant of check_ip
+        Uses httpx when installed, otherwise runs the request in the default executor
+
+        Args:
+            max_wait: Seconds to wait for a rate-limit slot before giving up
+        """
+        cached = self.cache.get('shodan', ip_address)
+        if cached:
+            return cached
+
+        if not await self.rate_limiter.acquire(max_wait):
+            logger.warning("Shodan rate limit exceeded, skipping %s", ip_address)
+            return _rate_limited(self._get_empty_response())
+
+        if httpx is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self._fetch, ip_address)
+
         try:
-            params = {"key": self.api_key}
-            url = f"{self.base_url}/shodan/host/{ip_address}"
-
-            response = requests.get(url, params=params, timeout=10)
-
-            self.rate_limiter.record_request()
-
-            if response.status_code == 200:
-                data = response.json()
-                result = self._parse_response(data)
-                self.cache.set('shodan', ip_address, result)
-                return result
-            elif response.status_code == 404:
-                # IP not found
-                result = self._get_empty_response()
-                result['status'] = 'not_found'
-                self.cache.set('shodan', ip_address, result)
-                return result
-            else:
-                logger.error(f"Shodan API error: {response.status_code}")
-                return self._get_empty_response()
+            url = self._host_url_prefix + ip_address
+
+            response = await self._get_async_client().get(url)
+
+            return self._handle_response(ip_address, response)
 
         except Exception as e:
-            logger.error(f"Shodan API exception: {e}")
+            logger.error("Shodan API exception: %s", e)
             return self._get_empty_response()
 
+    def _handle_response(self, ip_address: str, response) -> Dict[str, Any]:
+        """Turn a requests/httpx response into a result, caching it when useful"""
+        if response.status_code == 200:
+            data = self._read_host(response)
+            result = self._parse_response(data)
+            self.cache.set('shodan', ip_address, result)
+            return result
+        elif response.status_code == 404:
+            # IP not found
+            result = self._get_empty_response()
+            result['status'] = 'not_found'
+            self.cache.set('shodan', ip_address, result)
+            return result
+        else:
+            logger.error("Shodan API error: %s", response.status_code)
+            return self._get_empty_response()
+
+    def _read_host(self, response) -> Dict:
+        """Decode a host document, streaming past unused fields when possible"""
+        raw = getattr(response, 'raw', None)
+        if ijson is not None and hasattr(raw, 'read'):
+            raw.decode_content = True  # Let urllib3 undo gzip before parsing
+            return _parse_shodan_host(raw)
+        return serialization.loads(response.content)
+
     def _parse_response(self, data: Dict) -> Dict:
         """Parse Shodan response"""
         try:
@@ -385,7 +688,7 @@ class ShodanClient:
                 risk_score += min(50, len(vulns) * 10)
             if 22 in ports:  # SSH port exposed
                 risk_score += 20
-            if any(tag in ['malware', 'compromised', 'tor'] for tag in tags):
+            if not _SHODAN_BAD_TAGS.isdisjoint(tags):
                 risk_score += 30
 
             risk_score = min(100, risk_score)
@@ -410,21 +713,31 @@ class ShodanClient:
                 'last_update': data.get('last_update', None)
             }
         except Exception as e:
-            logger.error(f"Shodan response parse error: {e}")
+            logger.error("Shodan response parse error: %s", e)
             return self._get_empty_response()
 
+    def _get_async_client(self):
+        """Get this client's keep-alive AsyncClient, creating it on first use"""
+        if self._async_client is None:
+            self._async_client = _new_async_client(params=self._params)
+        return self._async_client
+
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async HTTP client, if one was created"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
     def _get_empty_response(self) -> Dict:
         """Return empty response structure"""
-        return {
-            'status': 'error',
-            'source': 'shodan',
-            'open_ports': [],
-            'num_ports': 0,
-            'vulnerabilities': [],
-            'num_vulnerabilities': 0,
-            'risk_score': 0,
-            'is_malicious': False
-        }
+        response = self._EMPTY_RESPONSE.copy()
+        response['open_ports'] = []  # Fresh lists so callers can't share them
+        response['vulnerabilities'] = []
+        return response
 
 
 class ThreatIntelligenceAggregator:
@@ -449,10 +762,14 @@ class ThreatIntelligenceAggregator:
         self.abuse_client = AbuseIPDBClient(config.get('abuseipdb_api_key'), self.cache) if config.get('abuseipdb_api_key') else None
         self.shodan_client = ShodanClient(config.get('shodan_api_key'), self.cache) if config.get('shodan_api_key') else None
 
-        logger.info(f"ThreatIntelligenceAggregator initialized with clients: "
-                   f"VT={self.vt_client is not None}, "
-                   f"Abuse={self.abuse_client is not None}, "
-                   f"Shodan={self.shodan_client is not None}")
+        # Overlaps the blocking per-source lookups in analyze_ip
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='threat-intel')
+
+        logger.info("ThreatIntelligenceAggregator initialized with clients: "
+                    "VT=%s, Abuse=%s, Shodan=%s",
+                    self.vt_client is not None,
+                    self.abuse_client is not None,
+                    self.shodan_client is not None)
 
     def analyze_ip(self, ip_address: str) -> Dict[str, Any]:
         """
@@ -469,21 +786,135 @@ class ThreatIntelligenceAggregator:
             'recommendations': []
         }
 
-        # Query all available sources
-        if self.vt_client:
-            results['sources']['virustotal'] = self.vt_client.check_ip(ip_address)
-
-        if self.abuse_client:
-            results['sources']['abuseipdb'] = self.abuse_client.check_ip(ip_address)
-
-        if self.shodan_client:
-            results['sources']['shodan'] = self.shodan_client.check_ip(ip_address)
+        # Query all available sources concurrently
+        clients = self._active_clients()
+        if len(clients) > 1:
+            futures = [(name, self._executor.submit(client.check_ip, ip_address))
+                       for name, client in clients]
+            for name, future in futures:
+                results['sources'][name] = future.result()
+        else:
+            for name, client in clients:
+                results['sources'][name] = client.check_ip(ip_address)
 
         # Aggregate scores
         results = self._aggregate_results(results)
 
         return results
 
+    async def analyze_ip_async(self, ip_address: str) -> Dict[str, Any]:
+        """
+        Async variant of analyze_ip
+        All sources are queried on the running event loop with asyncio.gather
+        """
+        return await self._analyze_async(
+            ip_address, lambda name, client: client.check_ip_async(ip_address)
+        )
+
+    async def analyze_ips(self, ip_addresses: List[str], max_concurrency: int = 64,
+                          max_wait: float = 60.0) -> Dict[str, Dict]:
+        """
+        Analyze many IPs at once, overlapping every IP x source request
+
+        Each source is limited to its client's max_concurrency in-flight
+        requests (matched to its per-minute quota) and all sources together
+        to max_concurrency. Lookups that get no rate-limit slot within
+        max_wait come back with status 'rate_limited'.
+
+        Args:
+            ip_addresses: IPs to analyze (duplicates are analyzed once)
+            max_concurrency: Cap on simultaneous requests across all sources
+            max_wait: Seconds each lookup may wait for its source's quota
+
+        Returns:
+            Dictionary mapping each IP to its analyze_ip-style result
+        """
+        total_limit = asyncio.Semaphore(max_concurrency)
+        source_limits = {
+            name: asyncio.Semaphore(client.max_concurrency)
+            for name, client in self._active_clients()
+        }
+
+        def gated(ip_address):
+            async def query(name, client):
+                async with source_limits[name], total_limit:
+                    return await client.check_ip_async(ip_address, max_wait=max_wait)
+            return query
+
+        unique_ips = list(dict.fromkeys(ip_addresses))
+        collected = await asyncio.gather(
+            *(self._collect_async(ip, gated(ip)) for ip in unique_ips)
+        )
+        return dict(zip(unique_ips, self.aggregate_batch(collected)))
+
+    def sweep_ips(self, ip_addresses: List[str], max_concurrency: int = 64,
+                  max_wait: float = 60.0) -> Dict[str, Dict]:
+        """
+        Blocking wrapper around analyze_ips for scripts and incident sweeps
+
+        Runs on a private event loop (uvloop when installed) and closes the
+        async HTTP clients before returning, since they are bound to it.
+        """
+        loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(
+                self.analyze_ips(ip_addresses, max_concurrency, max_wait)
+            )
+        finally:
+            loop.run_until_complete(self.aclose())
+            loop.close()
+
+    async def _analyze_async(self, ip_address: str, query) -> Dict[str, Any]:
+        """Run query(name, client) for every source concurrently and aggregate"""
+        return self._aggregate_results(await self._collect_async(ip_address, query))
+
+    async def _collect_async(self, ip_address: str, query) -> Dict[str, Any]:
+        """Run query(name, client) for every source concurrently, without aggregating"""
+        results = {
+            'ip': ip_address,
+            'timestamp': datetime.now().isoformat(),
+            'sources': {},
+            'aggregated_score': 0,
+            'is_malicious': False,
+            'threat_level': 'unknown',
+            'recommendations': []
+        }
+
+        clients = self._active_clients()
+        responses = await asyncio.gather(
+            *(query(name, client) for name, client in clients),
+            return_exceptions=True
+        )
+        for (name, client), response in zip(clients, responses):
+            if isinstance(response, Exception):
+                logger.error("%s lookup failed for %s: %s", name, ip_address, response)
+                response = client._get_empty_response()
+            results['sources'][name] = response
+
+        return results
+
+    def _active_clients(self) -> List[Tuple[str, Any]]:
+        """(source name, client) pairs for every configured API, in report order"""
+        return [
+            (name, client) for name, client in (
+                ('virustotal', self.vt_client),
+                ('abuseipdb', self.abuse_client),
+                ('shodan', self.shodan_client)
+            )
+            if client
+        ]
+
+    def close(self):
+        """Release pooled HTTP connections and worker threads"""
+        for _, client in self._active_clients():
+            client.close()
+        self._executor.shutdown(wait=False)
+
+    async def aclose(self):
+        """Close the async HTTP clients of all configured APIs"""
+        for _, client in self._active_clients():
+            await client.aclose()
+
     def _aggregate_results(self, results: Dict) -> Dict:
         """Aggregate scores from multiple sources"""
         sources = results['sources']
@@ -510,25 +941,56 @@ class ThreatIntelligenceAggregator:
         results['is_malicious'] = is_malicious_votes >= 2 or (is_malicious_votes >= 1 and results['aggregated_score'] > 70)
 
         # Assign threat level
-        score = results['aggregated_score']
-        if score >= 80:
-            results['threat_level'] = 'critical'
-            results['recommendations'].append('Block IP immediately')
-            results['recommendations'].append('Investigate all activity from this IP')
-        elif score >= 60:
-            results['threat_level'] = 'high'
-            results['recommendations'].append('Monitor closely and consider blocking')
-        elif score >= 40:
-            results['threat_level'] = 'medium'
-            results['recommendations'].append('Increase monitoring for this IP')
-        elif score >= 20:
-            results['threat_level'] = 'low'
-            results['recommendations'].append('Standard monitoring')
-        else:
-            results['threat_level'] = 'clean'
+        level = bisect_right(_THREAT_BOUNDS, results['aggregated_score'])
+        results['threat_level'] = _THREAT_LEVELS[level]
+        results['recommendations'].extend(_THREAT_RECOMMENDATIONS[level])
 
         return results
 
+    def aggregate_batch(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Vectorized _aggregate_results for many analyze_ip-style results
+
+        Per-source risk scores are gathered into one (IPs x sources) array
+        so the weighted score, majority vote and threat level are computed
+        with NumPy reductions instead of once per IP.
+
+        Args:
+            batch: Results with their 'sources' filled in, updated in place
+
+        Returns:
+            The same results, aggregated
+        """
+        width = max((len(results['sources']) for results in batch), default=0)
+        scores = np.full((len(batch), max(width, 1)), np.nan)
+        votes = np.zeros(len(batch), dtype=np.int64)
+
+        for row, results in enumerate(batch):
+            for col, source_data in enumerate(results['sources'].values()):
+                if source_data.get('status') == 'success':
+                    scores[row, col] = source_data.get('risk_score', 0)
+                    if source_data.get('is_malicious'):
+                        votes[row] += 1
+
+        # Weighted average with bias towards higher scores; 0 without any
+        valid = ~np.isnan(scores)
+        counts = valid.sum(axis=1)
+        max_scores = np.where(valid, scores, -np.inf).max(axis=1)
+        avg_scores = np.where(valid, scores, 0).sum(axis=1) / np.maximum(counts, 1)
+        aggregated = np.where(counts > 0, max_scores * 0.6 + avg_scores * 0.4, 0).astype(np.int64)
+
+        is_malicious = (votes >= 2) | ((votes >= 1) & (aggregated > 70))
+        levels = np.digitize(aggregated, _THREAT_BOUNDS)
+
+        for results, score, malicious, level in zip(
+                batch, aggregated.tolist(), is_malicious.tolist(), levels.tolist()):
+            results['aggregated_score'] = score
+            results['is_malicious'] = malicious
+            results['threat_level'] = _THREAT_LEVELS[level]
+            results['recommendations'].extend(_THREAT_RECOMMENDATIONS[level])
+
+        return batch
+
 
 # Example usage
 if __name__ == "__main__":
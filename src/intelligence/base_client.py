@@ -3,17 +3,43 @@ Base Client for Threat Intelligence APIs
 Provides caching, rate limiting, and error handling
 """
 
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import time
-import json
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
-import hashlib
+
+from . import serialization
+from .cache import IntelligenceCache
+
+try:
+    import httpx
+except ImportError:  # optional: native async lookups
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Error strings are cut to this length so bursts of failures keep results
+# (and the logs they end up in) small
+MAX_ERROR_CHARS = 500
+
+
+def error_text(error: Exception) -> str:
+    """str(error), truncated to MAX_ERROR_CHARS"""
+    return str(error)[:MAX_ERROR_CHARS]
+
 
 class BaseIntelligenceClient:
     """
@@ -21,27 +47,68 @@ class BaseIntelligenceClient:
     Provides common functionality: caching, rate limiting, error handling
     """
 
-    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600):
+    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600,
+                 memory_cache_size: int = 4096, cache: Optional[IntelligenceCache] = None):
         """
         Args:
             api_key: API key for the service
-            cache_dir: Directory to store cached responses
+            cache_dir: Directory to store cached responses (unused when cache is given)
             cache_ttl: Cache time-to-live in seconds (default: 1 hour)
+            memory_cache_size: Max parsed results kept in the in-memory LRU
+            cache: Shared IntelligenceCache; entries are namespaced by client class
         """
         self.api_key = api_key
         self.cache_dir = cache_dir
         self.cache_ttl = cache_ttl
-        self.last_request_time = 0
+
+        self._owns_cache = cache is None
+        self.cache = cache if cache is not None else IntelligenceCache(
+            cache_dir, memory_cache_size=memory_cache_size
+        )
+        self.cache_namespace = self.__class__.__name__  # This client's entries in the cache
+        self.last_request_time = 0.0  # time.monotonic() of the last reserved slot
         self.min_request_interval = 1.0  # Minimum seconds between requests
+        self.negative_cache_ttl = 60  # Seconds to cache 4xx answers (not found, ...)
+        self._rate_lock = threading.Lock()  # Serializes slot reservation across threads
+
+        # Pooled keep-alive session so repeated calls skip TCP/TLS handshakes
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET'],
+                raise_on_status=False
+            )
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update({'Accept': 'application/json'})
+
+        # Created lazily by _get_async_client() on first async request
+        self._async_client = None
+
+    def close(self):
+        """Release pooled HTTP connections (and the cache, unless it is shared)"""
+        self._session.close()
+        if self._owns_cache:
+            self.cache.close()
+
+    async def aclose(self):
+        """Release pooled HTTP connections, including the async client"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
 
-        # Create cache directory
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    def __enter__(self):
+        return self
 
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get cache file path for a given key"""
-        # Use hash to create safe filename
-        key_hash = hashlib.md5(cache_key.encode()).hexdigest()
-        return self.cache_dir / f"{key_hash}.json"
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def _get_cached(self, cache_key: str) -> Optional[Dict]:
         """
@@ -50,59 +117,87 @@ class BaseIntelligenceClient:
         Returns:
             Cached data or None if not found/expired
         """
-        cache_path = self._get_cache_path(cache_key)
+        return self.cache.get(self.cache_namespace, cache_key)
 
-        if not cache_path.exists():
-            return None
+    def get_cached_many(self, queries: List[str], **kwargs) -> Dict[str, Dict]:
+        """
+        Fresh cached lookup() results for many queries, read in one pass
 
-        try:
-            with open(cache_path, 'r') as f:
-                cache_data = json.load(f)
+        Args:
+            queries: IP addresses or other identifiers
+            **kwargs: lookup() options that select the cache entry
 
-            # Check expiration
-            cached_time = datetime.fromisoformat(cache_data['timestamp'])
-            if datetime.now() - cached_time > timedelta(seconds=self.cache_ttl):
-                logger.debug(f"Cache expired for key: {cache_key}")
-                return None
+        Returns:
+            Dictionary mapping each query with a fresh entry to its result
+        """
+        cache_keys = {self._lookup_cache_key(query, **kwargs): query for query in queries}
+        cached = self.cache.get_many(self.cache_namespace, list(cache_keys))
+        return {cache_keys[cache_key]: data for cache_key, data in cached.items() if data}
 
-            logger.info(f"Cache hit for key: {cache_key}")
-            return cache_data['data']
+    def _get_stale_cache(self, cache_key: str) -> Optional[Dict]:
+        """
+        Read the cache entry regardless of age
 
-        except Exception as e:
-            logger.error(f"Error reading cache: {e}")
-            return None
+        Returns:
+            Full cache entry (data plus any etag/last_modified) or None
+        """
+        return self.cache.get_entry(self.cache_namespace, cache_key)
 
-    def _save_cache(self, cache_key: str, data: Dict):
-        """Save data to cache"""
-        cache_path = self._get_cache_path(cache_key)
+    def _save_cache(self, cache_key: str, data: Dict, validators: Optional[Dict] = None,
+                    ttl: Optional[int] = None):
+        """
+        Save data to cache
 
-        try:
-            cache_data = {
-                'timestamp': datetime.now().isoformat(),
-                'key': cache_key,
-                'data': data
-            }
+        Args:
+            cache_key: Cache key
+            data: Parsed result to store
+            validators: Optional ETag/Last-Modified for conditional refresh
+            ttl: Per-entry lifetime in seconds (default: cache_ttl)
+        """
+        self.cache.set(
+            self.cache_namespace, cache_key, data,
+            ttl=self.cache_ttl if ttl is None else ttl, validators=validators
+        )
 
-            with open(cache_path, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+    def _save_error(self, cache_key: str, error: Dict):
+        """
+        Briefly cache a 4xx error answer so repeated lookups of a bad query
+        do not spend API credits; 5xx and network errors are never cached
+        """
+        status_code = error.get('status_code')
+        if status_code is not None and 400 <= status_code < 500:
+            self._save_cache(cache_key, error, ttl=self.negative_cache_ttl)
 
-            logger.debug(f"Cached data for key: {cache_key}")
+    def _reserve_request_slot(self) -> float:
+        """
+        Reserve the next free request slot
 
-        except Exception as e:
-            logger.error(f"Error saving cache: {e}")
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._rate_lock:
+            current_time = time.monotonic()
+            if not self.last_request_time:
+                # First request never waits
+                self.last_request_time = current_time
+                return 0.0
+            slot = max(current_time, self.last_request_time + self.min_request_interval)
+            self.last_request_time = slot
+
+        return slot - current_time
 
     def _rate_limit(self):
-        """Enforce rate limiting between requests"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        """
+        Enforce rate limiting between requests
 
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            logger.debug(f"Rate limiting: sleeping {sleep_time:.2f}s")
+        Thread-safe: each caller reserves the next free slot under a lock and
+        sleeps outside it, so concurrent lookups stay within the interval.
+        """
+        sleep_time = self._reserve_request_slot()
+        if sleep_time > 0:
+            logger.debug("Rate limiting: sleeping %.2fs", sleep_time)
             time.sleep(sleep_time)
 
-        self.last_request_time = time.time()
-
     def _make_request(self, url: str, headers: Dict = None, params: Dict = None,
                      timeout: int = 10) -> Optional[Dict]:
         """
@@ -111,41 +206,150 @@ class BaseIntelligenceClient:
         Returns:
             Response JSON or None on error
         """
+        return self._fetch(url, headers, params, timeout)[0]
+
+    def _fetch(self, url: str, headers: Dict = None, params: Dict = None,
+               timeout: int = 10, decoder: Callable[[bytes], Dict] = None
+               ) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Make HTTP request and also return the response's cache validators
+
+        Args:
+            decoder: Optional replacement for JSON decoding of 200 bodies
+
+        Returns:
+            Tuple of (response JSON or error dict, validators or None on error)
+        """
         try:
             self._rate_limit()
 
-            response = requests.get(
+            response = self._session.get(
                 url,
                 headers=headers or {},
                 params=params or {},
                 timeout=timeout
             )
 
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 204:
-                return {'message': 'No content available'}
-            elif response.status_code == 404:
-                return {'error': 'Not found', 'status_code': 404}
-            elif response.status_code == 429:
-                logger.warning("Rate limit exceeded")
-                return {'error': 'Rate limit exceeded', 'status_code': 429}
-            elif response.status_code == 403:
-                logger.error("API key invalid or forbidden")
-                return {'error': 'Forbidden - check API key', 'status_code': 403}
-            else:
-                logger.error(f"HTTP {response.status_code}: {response.text}")
-                return {'error': f'HTTP {response.status_code}', 'status_code': response.status_code}
+            return self._handle_response(response, decoder), self._response_validators(response)
 
         except requests.exceptions.Timeout:
-            logger.error(f"Request timeout for {url}")
-            return {'error': 'Request timeout'}
+            logger.error("Request timeout for %s", url)
+            return {'error': 'Request timeout'}, None
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {e}")
-            return {'error': str(e)}
+            logger.error("Request error: %s", error_text(e))
+            return {'error': error_text(e)}, None
+        except Exception as e:
+            logger.error("Unexpected error: %s", error_text(e))
+            return {'error': error_text(e)}, None
+
+    def _handle_response(self, response, decoder: Callable[[bytes], Dict] = None) -> Dict:
+        """Map a requests or httpx response to a result dict"""
+        status_code = response.status_code
+        if status_code == 200:
+            if decoder is not None:
+                return decoder(response.content)
+            return serialization.loads(response.content)
+        elif status_code == 204:
+            return {'message': 'No content available'}
+        elif status_code == 304:
+            return {'not_modified': True, 'status_code': 304}
+        elif status_code == 404:
+            return {'error': 'Not found', 'status_code': 404}
+        elif status_code == 429:
+            logger.warning("Rate limit exceeded")
+            return {'error': 'Rate limit exceeded', 'status_code': 429}
+        elif status_code == 403:
+            logger.error("API key invalid or forbidden")
+            return {'error': 'Forbidden - check API key', 'status_code': 403}
+        else:
+            logger.error("HTTP %s: %s", status_code, response.text)
+            return {'error': f'HTTP {status_code}', 'status_code': status_code}
+
+    @staticmethod
+    def _response_validators(response) -> Dict:
+        """Extract ETag/Last-Modified headers for later conditional requests"""
+        return {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+    @staticmethod
+    def _conditional_headers(headers: Dict, cache_entry: Optional[Dict]) -> Dict:
+        """Add If-None-Match/If-Modified-Since from a stale cache entry"""
+        if not cache_entry:
+            return headers
+        headers = dict(headers or {})
+        if cache_entry.get('etag'):
+            headers['If-None-Match'] = cache_entry['etag']
+        if cache_entry.get('last_modified'):
+            headers['If-Modified-Since'] = cache_entry['last_modified']
+        return headers
+
+    def _get_async_client(self):
+        """Get the shared httpx.AsyncClient, creating it on first use"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=20),
+                headers={'Accept': 'application/json'}
+            )
+        return self._async_client
+
+    async def _make_request_async(self, url: str, headers: Dict = None, params: Dict = None,
+                                  timeout: int = 10) -> Optional[Dict]:
+        """
+        Async variant of _make_request
+
+        Returns:
+            Response JSON or error dict
+        """
+        return (await self._fetch_async(url, headers, params, timeout))[0]
+
+    async def _fetch_async(self, url: str, headers: Dict = None, params: Dict = None,
+                           timeout: int = 10, decoder: Callable[[bytes], Dict] = None
+                           ) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Async variant of _fetch
+
+        Uses httpx when installed; otherwise runs the blocking request in
+        the default executor so callers can still await it.
+
+        Returns:
+            Tuple of (response JSON or error dict, validators or None on error)
+        """
+        if httpx is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, partial(self._fetch, url, headers, params, timeout, decoder)
+            )
+
+        try:
+            sleep_time = self._reserve_request_slot()
+            if sleep_time > 0:
+                logger.debug("Rate limiting: sleeping %.2fs", sleep_time)
+                await asyncio.sleep(sleep_time)
+
+            response = await self._get_async_client().get(
+                url,
+                headers=headers or {},
+                params=params or {},
+                timeout=timeout
+            )
+            return self._handle_response(response, decoder), self._response_validators(response)
+
+        except httpx.TimeoutException:
+            logger.error("Request timeout for %s", url)
+            return {'error': 'Request timeout'}, None
+        except httpx.HTTPError as e:
+            logger.error("Request error: %s", error_text(e))
+            return {'error': error_text(e)}, None
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return {'error': str(e)}
+            logger.error("Unexpected error: %s", error_text(e))
+            return {'error': error_text(e)}, None
+
+    def _lookup_cache_key(self, query: str, **kwargs) -> str:
+        """Cache key of a lookup() result (to be implemented by subclasses)"""
+        raise NotImplementedError("Subclasses must implement _lookup_cache_key()")
 
     def lookup(self, query: str, use_cache: bool = True) -> Dict:
         """
@@ -160,26 +364,65 @@ class BaseIntelligenceClient:
         """
         raise NotImplementedError("Subclasses must implement lookup()")
 
-    def get_cache_stats(self) -> Dict:
-        """Get cache statistics"""
-        cache_files = list(self.cache_dir.glob("*.json"))
+    async def lookup_async(self, query: str, use_cache: bool = True, **kwargs) -> Dict:
+        """
+        Awaitable lookup so several services can be queried on one event loop
 
-        total_size = sum(f.stat().st_size for f in cache_files)
+        Subclasses with a native async path override this; the default runs
+        lookup() in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self.lookup, query, use_cache=use_cache, **kwargs)
+        )
 
-        return {
-            'cache_entries': len(cache_files),
-            'cache_size_bytes': total_size,
-            'cache_size_mb': total_size / (1024 * 1024),
-            'cache_dir': str(self.cache_dir)
-        }
+    def lookup_many(self, queries: List[str], max_workers: int = 8, **kwargs) -> Dict[str, Dict]:
+        """
+        Look up many queries concurrently over the shared keep-alive session
+
+        Requests still respect min_request_interval; the thread pool overlaps
+        the network round-trips and cache reads.
+
+        Args:
+            queries: IP addresses or other identifiers
+            max_workers: Number of worker threads
+            **kwargs: Passed through to lookup()
+
+        Returns:
+            Dictionary mapping each query to its lookup result
+        """
+        results = {}
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return results
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.lookup, query, **kwargs): query
+                for query in unique_queries
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    results[query] = future.result()
+                except Exception as e:
+                    logger.error("Bulk lookup error for %s: %s", query, error_text(e))
+                    results[query] = {'error': error_text(e)}
+
+        return results
+
+    def get_cache_stats(self) -> Dict:
+        """Get cache statistics"""
+        stats = self.cache.get_stats(self.cache_namespace)
+        stats['cache_size_mb'] = stats['cache_size_bytes'] / (1024 * 1024)
+        return stats
 
     def clear_cache(self):
         """Clear all cached data"""
         try:
-            for cache_file in self.cache_dir.glob("*.json"):
-                cache_file.unlink()
+            self.cache.clear(self.cache_namespace)
             logger.info("Cache cleared")
             return {'success': True, 'message': 'Cache cleared'}
         except Exception as e:
-            logger.error(f"Error clearing cache: {e}")
+            logger.error("Error clearing cache: %s", e)
             return {'success': False, 'error': str(e)}
@@ -0,0 +1,334 @@
+"""
+Threat Intelligence Result Cache
+One SQLite-backed cache shared by every intelligence API client
+"""
+
+import ipaddress
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import serialization
+
+logger = logging.getLogger(__name__)
+
+
+class IntelligenceCache:
+    """
+    Persistent cache for API results to minimize requests
+    Backed by one SQLite database (cache_dir/intel.db) in WAL mode
+
+    Writes go to the in-memory LRU immediately and to SQLite on a single
+    background thread, so callers never wait on disk I/O to store a result.
+    """
+
+    def __init__(self, cache_dir: Path, cache_ttl_hours: float = 24, memory_cache_size: int = 4096):
+        """
+        Args:
+            cache_dir: Directory holding intel.db
+            cache_ttl_hours: Default entry lifetime, for set() calls without a ttl
+            memory_cache_size: Max results kept in the in-memory LRU
+        """
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_ttl = timedelta(hours=cache_ttl_hours)
+        self._ttl_seconds = self.cache_ttl.total_seconds()
+
+        # In-memory LRU in front of SQLite: {cache_key: (expires_at_monotonic, result)}
+        self.memory_cache_size = memory_cache_size
+        self._memory_cache = OrderedDict()
+
+        self.db_path = self.cache_dir / "intel.db"
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(cache)")}
+        if columns and 'ttl' not in columns:
+            # Database from before per-entry TTLs and validators; just rebuild it
+            self.conn.execute("DROP TABLE cache")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, api TEXT, query TEXT, cached_at REAL, ttl REAL, "
+            "etag TEXT, last_modified TEXT, payload BLOB)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS cache_api ON cache (api)")
+        self.conn.commit()
+
+        # One writer keeps SQLite writes in submission order. Pending writes
+        # hold a reference to the cache, so the writer is only stopped once
+        # they are done; at interpreter exit concurrent.futures drains it.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='intel-cache-writer')
+        weakref.finalize(self, self._writer.shutdown, wait=False)
+
+    def _get_cache_key(self, api_name: str, query: str) -> str:
+        """
+        Generate cache key (the SQLite primary key, so no hashing is needed)
+
+        IP queries are keyed by their packed address, so every spelling of
+        one host (IPv6 zero-compression, IPv4-mapped IPv6) shares an entry.
+        """
+        try:
+            ip = ipaddress.ip_address(query)
+        except ValueError:
+            return f"{api_name}:{query}"
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        return f"{api_name}:{ip.packed.hex()}"
+
+    def get(self, api_name: str, query: str) -> Optional[Dict]:
+        """
+        Get cached result if available and fresh
+
+        Expired rows are left in place for get_entry() (conditional
+        refreshes) and removed by purge_expired() or the next set().
+        """
+        cache_key = self._get_cache_key(api_name, query)
+
+        try:
+            with self._lock:
+                entry = self._memory_cache.get(cache_key)
+                if entry is not None:
+                    if entry[0] > time.monotonic():
+                        self._memory_cache.move_to_end(cache_key)
+                        return entry[1]
+                    del self._memory_cache[cache_key]
+
+                row = self.conn.execute(
+                    "SELECT cached_at, ttl, payload FROM cache WHERE key = ?", (cache_key,)
+                ).fetchone()
+
+            if row is None:
+                return None
+
+            # Check if cache is still fresh
+            ttl = self._ttl_seconds if row[1] is None else row[1]
+            age = time.time() - row[0]
+            if age > ttl:
+                logger.debug("Cache expired for %s:%s", api_name, query)
+                return None
+
+            logger.debug("Cache hit for %s:%s", api_name, query)
+            result = serialization.loads(row[2])
+            with self._lock:
+                self._remember(cache_key, result, ttl - age)
+            return result
+
+        except Exception as e:
+            logger.error("Cache read error: %s", e)
+            return None
+
+    def get_many(self, api_name: str, queries: List[str]) -> Dict[str, Dict]:
+        """
+        Get fresh cached results for many queries at once
+
+        Queries missing from the in-memory LRU are read with one SELECT per
+        500 keys instead of one per query.
+
+        Returns:
+            Dictionary mapping each query with a fresh entry to its result
+        """
+        results = {}
+        pending = {}
+        now = time.monotonic()
+
+        try:
+            with self._lock:
+                for query in queries:
+                    cache_key = self._get_cache_key(api_name, query)
+                    entry = self._memory_cache.get(cache_key)
+                    if entry is not None and entry[0] > now:
+                        self._memory_cache.move_to_end(cache_key)
+                        results[query] = entry[1]
+                    else:
+                        pending[cache_key] = query
+
+                keys = list(pending)
+                rows = []
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows.extend(self.conn.execute(
+                        "SELECT key, cached_at, ttl, payload FROM cache WHERE key IN (%s)"
+                        % ','.join('?' * len(chunk)),
+                        chunk
+                    ).fetchall())
+
+            wall_now = time.time()
+            fresh = []
+            for cache_key, cached_at, ttl, payload in rows:
+                ttl = self._ttl_seconds if ttl is None else ttl
+                age = wall_now - cached_at
+                if age <= ttl:
+                    result = serialization.loads(payload)
+                    results[pending[cache_key]] = result
+                    fresh.append((cache_key, result, ttl - age))
+
+            with self._lock:
+                for cache_key, result, remaining in fresh:
+                    self._remember(cache_key, result, remaining)
+            return results
+
+        except Exception as e:
+            logger.error("Cache read error: %s", e)
+            return results
+
+    def get_entry(self, api_name: str, query: str) -> Optional[Dict]:
+        """
+        Read a cache entry regardless of age
+
+        Returns:
+            {'data', 'cached_at', 'etag', 'last_modified'} or None
+        """
+        cache_key = self._get_cache_key(api_name, query)
+
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT cached_at, etag, last_modified, payload FROM cache WHERE key = ?",
+                    (cache_key,)
+                ).fetchone()
+            if row is None:
+                return None
+            return {
+                'data': serialization.loads(row[3]),
+                'cached_at': row[0],
+                'etag': row[1],
+                'last_modified': row[2]
+            }
+        except Exception as e:
+            logger.error("Cache read error: %s", e)
+            return None
+
+    def set(self, api_name: str, query: str, result: Dict, ttl: Optional[float] = None,
+            validators: Optional[Dict] = None):
+        """
+        Store result in cache
+
+        Args:
+            api_name: Namespace of the caching client
+            query: Lookup the result belongs to
+            result: Parsed result to store
+            ttl: Per-entry lifetime in seconds (default: cache_ttl_hours)
+            validators: Optional ETag/Last-Modified for conditional refresh
+        """
+        cache_key = self._get_cache_key(api_name, query)
+        validators = validators or {}
+
+        with self._lock:
+            self._remember(cache_key, result, self._ttl_seconds if ttl is None else ttl)
+        self._writer.submit(
+            self._write, cache_key, api_name, query, time.time(), ttl,
+            validators.get('etag'), validators.get('last_modified'), result
+        )
+
+    def _write(self, cache_key: str, api_name: str, query: str, cached_at: float,
+               ttl: Optional[float], etag: Optional[str], last_modified: Optional[str],
+               result: Dict):
+        """Persist one entry to SQLite (runs on the writer thread)"""
+        try:
+            payload = serialization.dumps(result)
+            with self._lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO cache "
+                    "(key, api, query, cached_at, ttl, etag, last_modified, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key, api_name, query, cached_at, ttl, etag, last_modified, payload)
+                )
+                self.conn.commit()
+            logger.debug("Cached result for %s:%s", api_name, query)
+        except Exception as e:
+            logger.error("Cache write error: %s", e)
+
+    def flush(self):
+        """Wait until every pending write has reached SQLite"""
+        self._writer.submit(lambda: None).result()
+
+    def _remember(self, cache_key: str, result: Dict, ttl: float):
+        """Store a result in the in-memory LRU (caller holds the lock)"""
+        self._memory_cache[cache_key] = (time.monotonic() + ttl, result)
+        self._memory_cache.move_to_end(cache_key)
+        if len(self._memory_cache) > self.memory_cache_size:
+            self._memory_cache.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        """Delete all stale entries, returning how many were removed"""
+        self.flush()
+        with self._lock:
+            deleted = self.conn.execute(
+                "DELETE FROM cache WHERE cached_at + coalesce(ttl, ?) < ?",
+                (self._ttl_seconds, time.time())
+            ).rowcount
+            self.conn.commit()
+        return deleted
+
+    def clear(self, api_name: Optional[str] = None) -> int:
+        """
+        Delete cached results, returning how many were removed
+
+        Args:
+            api_name: Only clear this namespace (default: everything)
+        """
+        self.flush()
+        with self._lock:
+            if api_name is None:
+                self._memory_cache.clear()
+                deleted = self.conn.execute("DELETE FROM cache").rowcount
+            else:
+                prefix = f"{api_name}:"
+                for cache_key in [k for k in self._memory_cache if k.startswith(prefix)]:
+                    del self._memory_cache[cache_key]
+                deleted = self.conn.execute(
+                    "DELETE FROM cache WHERE api = ?", (api_name,)
+                ).rowcount
+            self.conn.commit()
+        return deleted
+
+    def get_stats(self, api_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Args:
+            api_name: Only count this namespace (default: everything)
+        """
+        query = "SELECT count(*), coalesce(sum(length(payload)), 0) FROM cache"
+        params = ()
+        if api_name is not None:
+            query += " WHERE api = ?"
+            params = (api_name,)
+        self.flush()
+        with self._lock:
+            entries, size = self.conn.execute(query, params).fetchone()
+        return {
+            'cache_entries': entries,
+            'cache_size_bytes': size,
+            'cache_db': str(self.db_path)
+        }
+
+    def get_stats_by_api(self) -> Dict[str, Dict[str, Any]]:
+        """Get get_stats() for every namespace in one grouped query"""
+        self.flush()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT api, count(*), coalesce(sum(length(payload)), 0) FROM cache GROUP BY api"
+            ).fetchall()
+        return {
+            api_name: {
+                'cache_entries': entries,
+                'cache_size_bytes': size,
+                'cache_db': str(self.db_path)
+            }
+            for api_name, entries, size in rows
+        }
+
+    def close(self):
+        """Finish pending writes and close the database connection"""
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self.conn.close()
@@ -3,13 +3,36 @@ IP Enrichment Service
 Coordinates multiple threat intelligence sources to provide comprehensive IP analysis
 """
 
+import asyncio
+import copy
 import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from typing import Dict, List, Optional
 from pathlib import Path
 from datetime import datetime
 
+from .cache import IntelligenceCache
+
 logger = logging.getLogger(__name__)
 
+# Seconds lookup_ip waits for all sources; VirusTotal's free-tier pacing
+# alone can hold a request for 15s
+LOOKUP_TIMEOUT = 30.0
+
+# Complete lookup_ip results are memoized in-process, so an IP seen again
+# within this many seconds (e.g. a scanner retrying) skips the caches
+RESULT_MEMO_TTL = 600
+RESULT_MEMO_SIZE = 10000
+
+# With early_exit, sources not yet cached are queried cheapest quota first
+# and the rest are skipped once the verdict is clear
+_EARLY_EXIT_ORDER = ('abuseipdb', 'shodan', 'virustotal')
+_SKIPPED = {'error': 'skipped', 'skipped': True}
+
 
 class IPEnrichmentService:
     """
@@ -21,7 +44,9 @@ class IPEnrichmentService:
                  virustotal_api_key: Optional[str] = None,
                  shodan_api_key: Optional[str] = None,
                  abuseipdb_api_key: Optional[str] = None,
-                 cache_dir = None):
+                 cache_dir = None,
+                 early_exit: bool = False,
+                 max_concurrent_lookups: int = 4):
         """
         Initialize IP enrichment service with multiple intelligence sources
 
@@ -30,6 +55,11 @@ class IPEnrichmentService:
             shodan_api_key: Shodan API key (optional)
             abuseipdb_api_key: AbuseIPDB API key (optional)
             cache_dir: Directory for caching API responses (Path or str)
+            early_exit: Stop querying sources once the verdict is clear
+                (threat score >= 90, or < 5 with two sources responding);
+                skipped sources are reported as {'error': 'skipped', 'skipped': True}
+            max_concurrent_lookups: lookup_ip calls expected to overlap; each
+                gets one worker per source, so they never queue behind each other
         """
         # Handle both Path and str for cache_dir
         if cache_dir is None:
@@ -40,6 +70,11 @@ class IPEnrichmentService:
             self.cache_dir = cache_dir
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+        # One cache database shared by every client, namespaced per client
+        self.cache = IntelligenceCache(self.cache_dir)
+
+        self.early_exit = early_exit
+
         # Store API keys
         self.api_keys = {
             'virustotal': virustotal_api_key,
@@ -47,7 +82,6 @@ class IPEnrichmentService:
             'abuseipdb': abuseipdb_api_key
         }
 
-        # Initialize clients (will be done in substeps 2-4)
         self.virustotal_client = None
         self.shodan_client = None
         self.abuseipdb_client = None
@@ -55,52 +89,202 @@ class IPEnrichmentService:
         # Track which services are available
         self.available_services = []
 
+        # The per-source lookups of one IP run side by side, so a lookup takes
+        # as long as the slowest source rather than their sum. Sized so
+        # overlapping lookups (and timed-out ones still holding a worker
+        # through VirusTotal's pacing) do not wait for each other.
+        self._lookup_executor = ThreadPoolExecutor(
+            max_workers=len(self.api_keys) * max(1, max_concurrent_lookups),
+            thread_name_prefix='ip-enrichment'
+        )
+        weakref.finalize(self, self._lookup_executor.shutdown, wait=False)
+
+        # Recent lookup results: {ip: (expires_at_monotonic, result)}
+        self._mem_cache = OrderedDict()
+        self._mem_cache_lock = threading.Lock()
+
+        # Initialize clients up front so the first lookup does not pay for it
+        self._init_clients()
+
         logger.info(f"IPEnrichmentService initialized with cache at {self.cache_dir}")
 
     def _init_clients(self):
         """
-        Initialize API clients (lazy initialization)
-        Called when first lookup is performed
+        Initialize API clients
+
+        Runs at construction, building the configured clients concurrently;
+        later calls retry any client that failed to initialize.
         """
-        if self.virustotal_client is None and self.api_keys['virustotal']:
-            try:
-                from .virustotal_client import VirusTotalClient
-                self.virustotal_client = VirusTotalClient(
-                    api_key=self.api_keys['virustotal'],
-                    cache_dir=self.cache_dir / 'virustotal'
-                )
-                self.available_services.append('virustotal')
-                logger.info("✓ VirusTotal client initialized")
-            except Exception as e:
-                logger.warning(f"Could not initialize VirusTotal client: {e}")
+        pending = [
+            (name, init) for name, client, init in (
+                ('virustotal', self.virustotal_client, self._init_virustotal),
+                ('shodan', self.shodan_client, self._init_shodan),
+                ('abuseipdb', self.abuseipdb_client, self._init_abuseipdb)
+            )
+            if client is None and self.api_keys[name]
+        ]
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [(name, executor.submit(init)) for name, init in pending]
+
+        # Register in a fixed order, whichever client finished first
+        for name, future in futures:
+            client = future.result()
+            if client is not None:
+                setattr(self, f"{name}_client", client)
+                self.available_services.append(name)
+
+    def _init_virustotal(self):
+        """Create the VirusTotal client, or None if it cannot be initialized"""
+        try:
+            from .virustotal_client import VirusTotalClient
+            client = VirusTotalClient(
+                api_key=self.api_keys['virustotal'],
+                cache_dir=self.cache_dir,
+                cache=self.cache
+            )
+            logger.info("✓ VirusTotal client initialized")
+            return client
+        except Exception as e:
+            logger.warning(f"Could not initialize VirusTotal client: {e}")
+            return None
+
+    def _init_shodan(self):
+        """Create the Shodan client, or None if it cannot be initialized"""
+        try:
+            from .shodan_client import ShodanClient
+            client = ShodanClient(
+                api_key=self.api_keys['shodan'],
+                cache_dir=self.cache_dir,
+                cache=self.cache
+            )
+            logger.info("✓ Shodan client initialized")
+            return client
+        except Exception as e:
+            logger.warning(f"Could not initialize Shodan client: {e}")
+            return None
+
+    def _init_abuseipdb(self):
+        """Create the AbuseIPDB client, or None if it cannot be initialized"""
+        try:
+            from .abuseipdb_client import AbuseIPDBClient
+            client = AbuseIPDBClient(
+                api_key=self.api_keys['abuseipdb'],
+                cache_dir=self.cache_dir,
+                cache=self.cache
+            )
+            logger.info("✓ AbuseIPDB client initialized")
+            return client
+        except Exception as e:
+            logger.warning(f"Could not initialize AbuseIPDB client: {e}")
+            return None
+
+    def lookup_ip(self, ip_address: str, use_cache: bool = True) -> Dict:
+        """
+        Perform comprehensive IP lookup across all available sources
+
+        Args:
+            ip_address: IP address to look up
+            use_cache: Whether to use cached results
+
+        Returns:
+            Dictionary with aggregated threat intelligence data
+        """
+        logger.info(f"Looking up IP: {ip_address}")
 
-        if self.shodan_client is None and self.api_keys['shodan']:
+        if use_cache:
+            memoized = self._get_memoized(ip_address)
+            if memoized:
+                return memoized
+
+        # Retry any client that failed to initialize
+        self._init_clients()
+
+        results = self._new_results(ip_address)
+        sources = self._source_lookups()
+
+        if self.early_exit:
+            results['sources'] = self._lookup_until_decided(ip_address, use_cache, sources)
+            return self._finish_results(results, memoize=use_cache)
+
+        # Query all sources concurrently
+        futures = [
+            (name, self._lookup_executor.submit(lookup, ip_address, use_cache))
+            for name, _, lookup, _ in sources
+        ]
+        deadline = time.monotonic() + LOOKUP_TIMEOUT
+        for name, future in futures:
             try:
-                from .shodan_client import ShodanClient
-                self.shodan_client = ShodanClient(
-                    api_key=self.api_keys['shodan'],
-                    cache_dir=self.cache_dir / 'shodan'
-                )
-                self.available_services.append('shodan')
-                logger.info("✓ Shodan client initialized")
-            except Exception as e:
-                logger.warning(f"Could not initialize Shodan client: {e}")
+                results['sources'][name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                future.cancel()  # Frees the worker if the lookup never started
+                logger.warning(f"{name} lookup timed out for {ip_address}")
+                results['sources'][name] = {'error': 'timeout'}
+
+        return self._finish_results(results, memoize=use_cache)
+
+    def lookup_ips(self, ip_addresses: List[str], max_workers: int = 16,
+                   use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        Look up many IPs, e.g. every source IP in a batch of log lines
 
-        if self.abuseipdb_client is None and self.api_keys['abuseipdb']:
+        Duplicates are looked up once, cached results of every source are
+        fetched in one pass, and only the misses are queried, concurrently.
+
+        Args:
+            ip_addresses: IP addresses to look up
+            max_workers: Max source lookups in flight
+            use_cache: Whether to use cached results
+
+        Returns:
+            Dictionary mapping each IP to its lookup_ip-style result
+        """
+        self._init_clients()
+
+        results = {}
+        unique_ips = []
+        for ip_address in dict.fromkeys(ip_addresses):
+            memoized = self._get_memoized(ip_address) if use_cache else None
+            if memoized:
+                results[ip_address] = memoized
+            else:
+                unique_ips.append(ip_address)
+
+        sources = self._source_lookups()
+
+        cached = {}
+        for name, client, _, kwargs in sources:
             try:
-                from .abuseipdb_client import AbuseIPDBClient
-                self.abuseipdb_client = AbuseIPDBClient(
-                    api_key=self.api_keys['abuseipdb'],
-                    cache_dir=self.cache_dir / 'abuseipdb'
-                )
-                self.available_services.append('abuseipdb')
-                logger.info("✓ AbuseIPDB client initialized")
+                cached[name] = client.get_cached_many(unique_ips, **kwargs) if use_cache else {}
             except Exception as e:
-                logger.warning(f"Could not initialize AbuseIPDB client: {e}")
+                logger.error(f"{name} cache prefetch error: {e}")
+                cached[name] = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                (name, ip_address): executor.submit(lookup, ip_address, use_cache)
+                for name, _, lookup, _ in sources
+                for ip_address in unique_ips
+                if ip_address not in cached[name]
+            }
 
-    def lookup_ip(self, ip_address: str, use_cache: bool = True) -> Dict:
+            timestamp = datetime.now().isoformat()
+            for ip_address in unique_ips:
+                ip_results = self._new_results(ip_address, timestamp)
+                for name, _, _, _ in sources:
+                    future = futures.get((name, ip_address))
+                    ip_results['sources'][name] = (
+                        future.result() if future else cached[name][ip_address]
+                    )
+                results[ip_address] = self._finish_results(ip_results, memoize=use_cache)
+
+        return {ip_address: results[ip_address] for ip_address in dict.fromkeys(ip_addresses)}
+
+    async def lookup_ip_async(self, ip_address: str, use_cache: bool = True) -> Dict:
         """
-        Perform comprehensive IP lookup across all available sources
+        Async variant of lookup_ip, querying all sources on the running event loop
 
         Args:
             ip_address: IP address to look up
@@ -111,12 +295,134 @@ class IPEnrichmentService:
         """
         logger.info(f"Looking up IP: {ip_address}")
 
-        # Initialize clients on first use
+        if use_cache:
+            memoized = self._get_memoized(ip_address)
+            if memoized:
+                return memoized
+
         self._init_clients()
 
-        results = {
+        results = self._new_results(ip_address)
+
+        lookups = []
+        if self.virustotal_client:
+            lookups.append(('virustotal', self.virustotal_client.lookup_async(
+                ip_address, use_cache=use_cache)))
+        if self.shodan_client:
+            lookups.append(('shodan', self.shodan_client.lookup_async(
+                ip_address, use_cache=use_cache)))
+        if self.abuseipdb_client:
+            lookups.append(('abuseipdb', self.abuseipdb_client.lookup_async(
+                ip_address, use_cache=use_cache, include_reports=False)))
+
+        if self.early_exit:
+            # Take answers as they arrive and cancel the rest once decided
+            tasks = {asyncio.ensure_future(lookup): name for name, lookup in lookups}
+            answers = {}
+            pending = set(tasks)
+            while pending and not self._is_decided(answers):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    answers[tasks[task]] = self._task_answer(tasks[task], task)
+            for task in pending:
+                task.cancel()
+            for name, _ in lookups:
+                results['sources'][name] = answers.get(name, dict(_SKIPPED))
+            return self._finish_results(results, memoize=use_cache)
+
+        responses = await asyncio.gather(
+            *(lookup for _, lookup in lookups), return_exceptions=True
+        )
+        for (name, _), response in zip(lookups, responses):
+            if isinstance(response, Exception):
+                logger.error(f"{name} lookup error: {response}")
+                response = {'error': str(response)}
+            results['sources'][name] = response
+
+        return self._finish_results(results, memoize=use_cache)
+
+    @staticmethod
+    def _task_answer(name: str, task) -> Dict:
+        """Result of a finished lookup task, or its error information"""
+        if task.exception() is not None:
+            logger.error(f"{name} lookup error: {task.exception()}")
+            return {'error': str(task.exception())}
+        return task.result()
+
+    async def lookup_ips_async(self, ip_addresses: List[str], concurrency: int = 20) -> Dict[str, Dict]:
+        """
+        Look up many IPs on one event loop
+
+        Args:
+            ip_addresses: IPs to look up (duplicates are looked up once)
+            concurrency: Max IPs being looked up at the same time
+
+        Returns:
+            Dictionary mapping each IP to its lookup_ip-style result
+        """
+        limit = asyncio.Semaphore(concurrency)
+
+        async def lookup(ip_address):
+            async with limit:
+                return await self.lookup_ip_async(ip_address)
+
+        unique_ips = list(dict.fromkeys(ip_addresses))
+        results = await asyncio.gather(*(lookup(ip) for ip in unique_ips))
+        return dict(zip(unique_ips, results))
+
+    def _source_lookups(self) -> List:
+        """(name, client, lookup, cache kwargs) for every configured source, in report order"""
+        return [
+            (name, client, lookup, kwargs) for name, client, lookup, kwargs in (
+                ('virustotal', self.virustotal_client, self._lookup_virustotal, {}),
+                ('shodan', self.shodan_client, self._lookup_shodan, {}),
+                ('abuseipdb', self.abuseipdb_client, self._lookup_abuseipdb,
+                 {'include_reports': False})
+            )
+            if client
+        ]
+
+    def _lookup_until_decided(self, ip_address: str, use_cache: bool, sources: List) -> Dict:
+        """
+        Query sources one at a time until the verdict is clear
+
+        Cached answers are taken first, then the remaining sources are
+        queried in _EARLY_EXIT_ORDER; any left over are marked skipped.
+
+        Returns:
+            Source results in report order
+        """
+        answers = {}
+        if use_cache:
+            for name, client, _, kwargs in sources:
+                cached = client.get_cached_many([ip_address], **kwargs).get(ip_address)
+                if cached:
+                    answers[name] = cached
+
+        pending = sorted(
+            (source for source in sources if source[0] not in answers),
+            key=lambda source: _EARLY_EXIT_ORDER.index(source[0])
+        )
+        for name, _, lookup, _ in pending:
+            if self._is_decided(answers):
+                break
+            answers[name] = lookup(ip_address, use_cache)
+
+        return {name: answers.get(name, dict(_SKIPPED)) for name, _, _, _ in sources}
+
+    def _is_decided(self, answers: Dict) -> bool:
+        """Whether the sources answered so far already settle the verdict"""
+        if not answers:
+            return False
+        responded = sum(1 for answer in answers.values() if not answer.get('error'))
+        threat_score = self._analyze_results(answers)['threat_score']
+        return threat_score >= 90 or (responded >= 2 and threat_score < 5)
+
+    def _new_results(self, ip_address: str, timestamp: Optional[str] = None) -> Dict:
+        """Result skeleton for one IP lookup; batches pass one shared timestamp"""
+        return {
             'ip': ip_address,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp or datetime.now().isoformat(),
             'sources': {},
             'summary': {
                 'is_threat': False,
@@ -127,35 +433,45 @@ class IPEnrichmentService:
             }
         }
 
-        # Query VirusTotal
-        if self.virustotal_client:
-            results['sources']['virustotal'] = self._lookup_virustotal(ip_address, use_cache)
-            results['summary']['sources_queried'] += 1
-            if not results['sources']['virustotal'].get('error'):
-                results['summary']['sources_responded'] += 1
-
-        # Query Shodan
-        if self.shodan_client:
-            results['sources']['shodan'] = self._lookup_shodan(ip_address, use_cache)
-            results['summary']['sources_queried'] += 1
-            if not results['sources']['shodan'].get('error'):
-                results['summary']['sources_responded'] += 1
-
-        # Query AbuseIPDB
-        if self.abuseipdb_client:
-            results['sources']['abuseipdb'] = self._lookup_abuseipdb(ip_address, use_cache)
-            results['summary']['sources_queried'] += 1
-            if not results['sources']['abuseipdb'].get('error'):
-                results['summary']['sources_responded'] += 1
-
-        # Aggregate and analyze results
+    def _finish_results(self, results: Dict, memoize: bool = False) -> Dict:
+        """Aggregate and analyze the collected source results"""
         results['summary'] = self._analyze_results(results['sources'])
         results['summary']['sources_queried'] = len(self.available_services)
 
-        logger.info(f"IP lookup complete: {ip_address} - Threat: {results['summary']['is_threat']}")
+        logger.info(f"IP lookup complete: {results['ip']} - Threat: {results['summary']['is_threat']}")
+
+        # Only complete results are memoized; a failed source is retried next time
+        if memoize and not any(
+                source.get('error') and not source.get('skipped')
+                for source in results['sources'].values()):
+            # Memoize a private copy, so editing the returned results is safe
+            memo = copy.deepcopy(results)
+            with self._mem_cache_lock:
+                self._mem_cache[results['ip']] = (time.monotonic() + RESULT_MEMO_TTL, memo)
+                self._mem_cache.move_to_end(results['ip'])
+                if len(self._mem_cache) > RESULT_MEMO_SIZE:
+                    self._mem_cache.popitem(last=False)
 
         return results
 
+    def _get_memoized(self, ip_address: str) -> Optional[Dict]:
+        """
+        Recent lookup result for an IP, or None
+
+        Returns a deep copy: callers keep and edit results (nested source
+        dicts included) without touching the memoized one
+        """
+        with self._mem_cache_lock:
+            entry = self._mem_cache.get(ip_address)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._mem_cache[ip_address]
+                return None
+            self._mem_cache.move_to_end(ip_address)
+            result = entry[1]
+        return copy.deepcopy(result)
+
     def _lookup_virustotal(self, ip_address: str, use_cache: bool) -> Dict:
         """Query VirusTotal for IP information"""
         try:
@@ -180,7 +496,11 @@ class IPEnrichmentService:
         """Query AbuseIPDB for IP information"""
         try:
             if self.abuseipdb_client:
-                return self.abuseipdb_client.lookup(ip_address, use_cache=use_cache)
+                # Only scores and report counts are used here, so skip the
+                # verbose per-report payload
+                return self.abuseipdb_client.lookup(
+                    ip_address, use_cache=use_cache, include_reports=False
+                )
             return {'error': 'AbuseIPDB client not available'}
         except Exception as e:
             logger.error(f"AbuseIPDB lookup error: {e}")
@@ -202,7 +522,9 @@ class IPEnrichmentService:
             'confidence': 'low'
         }
 
-        threat_scores = []
+        # Running maximum of the scores found (all of them are positive)
+        max_score = 0
+        has_score = False
 
         # Analyze VirusTotal results
         vt_data = sources.get('virustotal', {})
@@ -213,7 +535,9 @@ class IPEnrichmentService:
 
             if malicious_count > 0:
                 vt_score = (malicious_count / total_scanners) * 100
-                threat_scores.append(vt_score)
+                if vt_score > max_score:
+                    max_score = vt_score
+                has_score = True
                 summary['threat_indicators'].append(
                     f"VirusTotal: {malicious_count}/{total_scanners} flagged as malicious"
                 )
@@ -226,13 +550,17 @@ class IPEnrichmentService:
             open_ports = shodan_data.get('open_ports', [])
 
             if vulns:
-                threat_scores.append(70)  # Known vulnerabilities
+                if 70 > max_score:  # Known vulnerabilities
+                    max_score = 70
+                has_score = True
                 summary['threat_indicators'].append(
                     f"Shodan: {len(vulns)} known vulnerabilities"
                 )
 
             if len(open_ports) > 5:
-                threat_scores.append(40)  # Many open ports
+                if 40 > max_score:  # Many open ports
+                    max_score = 40
+                has_score = True
                 summary['threat_indicators'].append(
                     f"Shodan: {len(open_ports)} open ports detected"
                 )
@@ -244,14 +572,16 @@ class IPEnrichmentService:
             abuse_score = abuse_data.get('abuse_confidence_score', 0)
 
             if abuse_score > 0:
-                threat_scores.append(abuse_score)
+                if abuse_score > max_score:
+                    max_score = abuse_score
+                has_score = True
                 summary['threat_indicators'].append(
                     f"AbuseIPDB: {abuse_score}% abuse confidence"
                 )
 
         # Calculate overall threat score
-        if threat_scores:
-            summary['threat_score'] = max(threat_scores)  # Use highest score
+        if has_score:
+            summary['threat_score'] = max_score  # Use highest score
             summary['is_threat'] = summary['threat_score'] >= 30
 
             # Determine threat level
@@ -304,17 +634,22 @@ class IPEnrichmentService:
         return status
 
     def _get_cache_stats(self) -> Dict:
-        """Get cache statistics for all services"""
-        stats = {}
-
-        if self.virustotal_client:
-            stats['virustotal'] = self.virustotal_client.get_cache_stats()
+        """
+        Get cache statistics for all services
 
-        if self.shodan_client:
-            stats['shodan'] = self.shodan_client.get_cache_stats()
+        The clients share one cache, so a single grouped query covers them.
+        """
+        by_namespace = self.cache.get_stats_by_api()
+        stats = {}
 
-        if self.abuseipdb_client:
-            stats['abuseipdb'] = self.abuseipdb_client.get_cache_stats()
+        for name, client in self._configured_clients():
+            client_stats = by_namespace.get(client.cache_namespace) or {
+                'cache_entries': 0,
+                'cache_size_bytes': 0,
+                'cache_db': str(self.cache.db_path)
+            }
+            client_stats['cache_size_mb'] = client_stats['cache_size_bytes'] / (1024 * 1024)
+            stats[name] = client_stats
 
         return stats
 
@@ -322,13 +657,28 @@ class IPEnrichmentService:
         """Clear caches for all services"""
         results = {}
 
-        if self.virustotal_client:
-            results['virustotal'] = self.virustotal_client.clear_cache()
-
-        if self.shodan_client:
-            results['shodan'] = self.shodan_client.clear_cache()
+        with self._mem_cache_lock:
+            self._mem_cache.clear()
 
-        if self.abuseipdb_client:
-            results['abuseipdb'] = self.abuseipdb_client.clear_cache()
+        for name, client in self._configured_clients():
+            results[name] = client.clear_cache()
 
         return results
+
+    def close(self):
+        """Stop the lookup workers and release every client's connections"""
+        self._lookup_executor.shutdown(wait=False)
+        for name, client in self._configured_clients():
+            client.close()
+        self.cache.close()
+
+    def _configured_clients(self) -> List:
+        """(service name, client) pairs for every initialized client"""
+        return [
+            (name, client) for name, client in (
+                ('virustotal', self.virustotal_client),
+                ('shodan', self.shodan_client),
+                ('abuseipdb', self.abuseipdb_client)
+            )
+            if client
+        ]
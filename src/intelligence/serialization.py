@@ -0,0 +1,29 @@
+"""
+JSON Serialization Helpers
+Uses orjson when installed (faster, works on bytes directly),
+falls back to the standard library json module otherwise
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+
+def loads(payload) -> Any:
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        payload = bytes(payload).decode('utf-8')
+    return json.loads(payload)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
@@ -6,10 +6,19 @@ Provides IP information, open ports, vulnerabilities, and service details
 import logging
 from typing import Dict, Optional, List
 from pathlib import Path
-from .base_client import BaseIntelligenceClient
+from .base_client import BaseIntelligenceClient, error_text
+from .cache import IntelligenceCache
 
 logger = logging.getLogger(__name__)
 
+# Shodan tags that indicate malicious activity (matched case-insensitively)
+_MALICIOUS_TAGS = frozenset({'malware', 'botnet', 'tor', 'vpn', 'proxy', 'scanner'})
+
+# Parsed (and cached) results keep the first MAX_SERVICES services, with
+# banners cut to BANNER_CHARS characters
+MAX_SERVICES = 10
+BANNER_CHARS = 200
+
 
 class ShodanClient(BaseIntelligenceClient):
     """
@@ -19,7 +28,8 @@ class ShodanClient(BaseIntelligenceClient):
     API docs: https://developer.shodan.io/api
     """
 
-    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600):
+    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600,
+                 cache: Optional[IntelligenceCache] = None, debug: bool = False):
         """
         Initialize Shodan client
 
@@ -27,10 +37,13 @@ class ShodanClient(BaseIntelligenceClient):
             api_key: Shodan API key
             cache_dir: Directory for caching responses
             cache_ttl: Cache time-to-live in seconds (default: 1 hour)
+            cache: Shared cache to use instead of one in cache_dir
+            debug: Include the raw API response in parse errors
         """
-        super().__init__(api_key, cache_dir, cache_ttl)
+        super().__init__(api_key, cache_dir, cache_ttl, cache=cache)
         self.base_url = "https://api.shodan.io"
         self.min_request_interval = 1.0  # Be respectful with API calls
+        self.debug = debug
         logger.info("Shodan client initialized")
 
     def lookup(self, ip_address: str, use_cache: bool = True) -> Dict:
@@ -44,7 +57,7 @@ class ShodanClient(BaseIntelligenceClient):
         Returns:
             Dictionary with Shodan analysis results
         """
-        cache_key = f"shodan_{ip_address}"
+        cache_key = self._lookup_cache_key(ip_address)
 
         # Check cache first
         if use_cache:
@@ -53,26 +66,61 @@ class ShodanClient(BaseIntelligenceClient):
                 return cached
 
         # Make API request
-        url = f"{self.base_url}/shodan/host/{ip_address}"
-        params = {'key': self.api_key}
+        response = self._make_request(self._host_url(ip_address), params={'key': self.api_key})
+        return self._handle_host_response(response, cache_key, use_cache)
 
-        response = self._make_request(url, params=params)
+    async def lookup_async(self, ip_address: str, use_cache: bool = True) -> Dict:
+        """
+        Async variant of lookup(), for overlapping with other intel services
+
+        Args:
+            ip_address: IP address to query
+            use_cache: Whether to use cached data
+
+        Returns:
+            Dictionary with Shodan analysis results
+        """
+        cache_key = self._lookup_cache_key(ip_address)
+
+        if use_cache:
+            cached = self._get_cached(cache_key)
+            if cached:
+                return cached
+
+        response = await self._make_request_async(
+            self._host_url(ip_address), params={'key': self.api_key}
+        )
+        return self._handle_host_response(response, cache_key, use_cache)
+
+    def _lookup_cache_key(self, ip_address: str) -> str:
+        """Cache key of a lookup() result"""
+        return f"shodan_{ip_address}"
+
+    def _host_url(self, ip_address: str) -> str:
+        """URL of the /shodan/host lookup for an IP"""
+        return f"{self.base_url}/shodan/host/{ip_address}"
 
+    def _handle_host_response(self, response: Dict, cache_key: str, use_cache: bool) -> Dict:
+        """Parse and cache a host lookup response, or return its error information"""
         if response and not response.get('error'):
             result = self._parse_response(response)
 
-            # Cache successful response
+            # Cache successful response; a parse error only as briefly as other errors
             if use_cache:
-                self._save_cache(cache_key, result)
+                ttl = self.negative_cache_ttl if result.get('error') else None
+                self._save_cache(cache_key, result, ttl=ttl)
 
             return result
         else:
             # Return error information
-            return {
+            error = {
                 'error': response.get('error', 'Unknown error'),
                 'status_code': response.get('status_code'),
                 'service': 'shodan'
             }
+            if use_cache:
+                self._save_error(cache_key, error)
+            return error
 
     def _parse_response(self, response: Dict) -> Dict:
         """
@@ -100,21 +148,24 @@ class ShodanClient(BaseIntelligenceClient):
             services = []
             vulnerabilities = []
 
+            seen_vuln_ids = set()
+
             data = response.get('data', [])
             for service_data in data:
-                service_info = {
-                    'port': service_data.get('port'),
-                    'transport': service_data.get('transport', 'tcp'),
-                    'product': service_data.get('product', 'Unknown'),
-                    'version': service_data.get('version', ''),
-                    'banner': service_data.get('data', '')[:200]  # First 200 chars
-                }
-                services.append(service_info)
+                if len(services) < MAX_SERVICES:
+                    services.append({
+                        'port': service_data.get('port'),
+                        'transport': service_data.get('transport', 'tcp'),
+                        'product': service_data.get('product', 'Unknown'),
+                        'version': service_data.get('version', ''),
+                        'banner': service_data.get('data', '')[:BANNER_CHARS]
+                    })
 
                 # Extract vulnerabilities
                 vulns = service_data.get('vulns', {})
-                for vuln_id in vulns.keys():
-                    if vuln_id not in [v['id'] for v in vulnerabilities]:
+                for vuln_id in vulns:
+                    if vuln_id not in seen_vuln_ids:
+                        seen_vuln_ids.add(vuln_id)
                         vulnerabilities.append({
                             'id': vuln_id,
                             'port': service_data.get('port'),
@@ -142,8 +193,7 @@ class ShodanClient(BaseIntelligenceClient):
                 threat_indicators.append(f"{len(vulnerabilities)} known vulnerabilities")
 
             # Certain tags indicate malicious activity
-            malicious_tags = ['malware', 'botnet', 'tor', 'vpn', 'proxy', 'scanner']
-            found_tags = [tag for tag in tags if tag.lower() in malicious_tags]
+            found_tags = [tag for tag in tags if tag.lower() in _MALICIOUS_TAGS]
             if found_tags:
                 threat_score += 40
                 threat_indicators.append(f"Tagged as: {', '.join(found_tags)}")
@@ -166,10 +216,8 @@ class ShodanClient(BaseIntelligenceClient):
                     'isp': isp
                 },
                 'open_ports': ports,
-                'port_count': len(ports),
-                'services': services[:10],  # Top 10 services
+                'services': services,
                 'vulnerabilities': vulnerabilities,
-                'vulnerability_count': len(vulnerabilities),
                 'tags': tags,
                 'threat_score': min(threat_score, 100),
                 'threat_indicators': threat_indicators,
@@ -184,12 +232,14 @@ class ShodanClient(BaseIntelligenceClient):
             return parsed
 
         except Exception as e:
-            logger.error(f"Error parsing Shodan response: {e}")
-            return {
-                'error': f'Parse error: {str(e)}',
-                'service': 'shodan',
-                'raw_response': response
+            logger.error(f"Error parsing Shodan response: {error_text(e)}")
+            error = {
+                'error': f'Parse error: {error_text(e)}',
+                'service': 'shodan'
             }
+            if self.debug:
+                error['raw_response'] = response
+            return error
 
     def search(self, query: str, limit: int = 10) -> Dict:
         """
@@ -3,17 +3,89 @@ Smart Telegram Alerting System
 Aggregates and prioritizes alerts to avoid message bombardment
 """
 
+import asyncio
+import atexit
+import bisect
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+import heapq
+import itertools
+import queue
 from datetime import datetime, timedelta
-from typing import Dict, List
-from collections import defaultdict
+from typing import Dict, List, Optional
+from collections import Counter, OrderedDict, defaultdict, deque
 from dataclasses import dataclass, field
 import threading
 import logging
 
+from . import serialization
+from .api_clients import TokenBucket
+
+try:
+    import httpx
+except ImportError:  # optional: concurrent async Telegram posts
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Queued messages are coalesced into posts of at most this many characters
+# (Telegram rejects messages over 4096)
+TELEGRAM_BATCH_CHARS = 3900
+MESSAGE_SEPARATOR = "\n\n---\n\n"
+
+# Telegram's bot limit is 30 messages/second; with httpx, up to
+# TELEGRAM_MAX_IN_FLIGHT posts that are ready together go out concurrently
+TELEGRAM_RATE_PER_SECOND = 30
+TELEGRAM_MAX_IN_FLIGHT = 4
+
+# Most (ip, server, threat) keys remembered for deduplication
+MAX_SEEN_EVENTS = 50000
+
+BATCH_INTERVAL_SECONDS = 15 * 60
+DIGEST_INTERVAL_SECONDS = 60 * 60
+
+# Pending high/medium alerts that trigger an early batch alert
+BATCH_FLUSH_THRESHOLD = 50
+
+# Each campaign keeps its latest alerts and is dropped once idle this long
+CAMPAIGN_MAX_ALERTS = 50
+CAMPAIGN_IDLE_TIMEOUT = timedelta(hours=24)
+
+SEVERITY_EMOJI = {
+    'critical': '🚨',
+    'high': '⚠️',
+    'medium': '⚡',
+    'low': '🔍',
+    'info': 'ℹ️'
+}
+
+# Message headers, built once per severity
+_IMMEDIATE_HEADERS = {
+    severity: f"{emoji} *{severity.upper()} SECURITY ALERT*"
+    for severity, emoji in SEVERITY_EMOJI.items()
+}
+_BATCH_HEADERS = {
+    severity: f"⚡ *{severity.upper()} PRIORITY BATCH ALERT*" for severity in ('high', 'medium')
+}
+
+# Characters with special meaning in Telegram Markdown, each mapped to its escaped form
+_MD_ESCAPE_TABLE = {ord(char): '\\' + char for char in '_*[]()~`>#+-=|{}.!'}
+
+
+def escape_md(text):
+    """Escape special characters for Telegram Markdown"""
+    if not text:
+        return text
+    return str(text).translate(_MD_ESCAPE_TABLE)
+
 @dataclass
 class Alert:
     """Individual alert"""
@@ -53,6 +125,11 @@ class SmartAlertManager:
         'critical': (90, 100)
     }
 
+    # Bounds of each severity, for bisecting
+    _SEVERITY_CUTOFFS = [max_score for _, max_score in SEVERITY_THRESHOLDS.values()]
+    _SEVERITY_FLOORS = [min_score for min_score, _ in SEVERITY_THRESHOLDS.values()]
+    _SEVERITY_LABELS = list(SEVERITY_THRESHOLDS)
+
     # Alert rules
     ALERT_RULES = {
         'critical_immediate': {
@@ -87,16 +164,38 @@ class SmartAlertManager:
         self.bot_token = telegram_bot_token
         self.chat_id = telegram_chat_id
         self.enable_smart_grouping = enable_smart_grouping
+        self._send_url = f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
+
+        # Keep-alive session so posts reuse one TLS connection to Telegram;
+        # only the requests-based sender uses it (httpx has its own client)
+        self._session = None
+        if httpx is None:
+            self._session = requests.Session()
+            self._session.mount('https://', HTTPAdapter(
+                pool_connections=2,
+                pool_maxsize=4,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=[429, 502, 503],
+                    allowed_methods=['POST'],
+                    raise_on_status=False
+                )
+            ))
+            self._session.headers.update({'Content-Type': 'application/json'})
 
         # Alert buffers
         self.pending_alerts = []
         self.alert_history = []
-        self.last_digest_time = datetime.now()
-        self.last_batch_time = datetime.now()
+        self.last_digest_time = datetime.now()  # Wall clock, shown as the digest period start
+
+        # Scheduling uses the monotonic clock, immune to wall-clock jumps
+        self._last_batch_mono = self._last_digest_mono = time.monotonic()
 
         # Deduplication tracking
-        self.seen_events = {}  # key: (ip, server, threat), value: last_seen_time
-        self.attack_campaigns = defaultdict(list)  # Track ongoing campaigns
+        # key: (ip, server, threat), value: last_seen (monotonic), oldest first
+        self.seen_events = OrderedDict()
+        self.attack_campaigns = {}  # Track ongoing campaigns: (ip, server) -> deque of recent alerts
 
         # Statistics
         self.stats = {
@@ -109,16 +208,39 @@ class SmartAlertManager:
         # Thread safety
         self.lock = threading.Lock()
 
+        # Background thread scheduling: _wakeup triggers an early batch alert
+        # (or, with _shutdown set, makes the threads exit)
+        self._wakeup = threading.Event()
+        self._shutdown = threading.Event()
+        self._unbatched = 0  # Pending alerts the next batch alert will include
+
+        # Outgoing Telegram messages: (priority, sequence, text), urgent first
+        self._out_queue = queue.PriorityQueue()
+        self._out_sequence = itertools.count()
+        self.sender_thread = threading.Thread(
+            target=self._async_telegram_sender if httpx is not None else self._telegram_sender,
+            daemon=True
+        )
+        self.sender_thread.start()
+
         # Start background processor
         if enable_smart_grouping:
             self.processor_thread = threading.Thread(target=self._process_pending_alerts, daemon=True)
             self.processor_thread.start()
 
+        # The threads are daemons, so flush queued alerts before the interpreter exits
+        atexit.register(self.close)
+
     def get_severity(self, risk_score: int) -> str:
-        """Determine severity level from risk score"""
-        for severity, (min_score, max_score) in self.SEVERITY_THRESHOLDS.items():
-            if min_score <= risk_score <= max_score:
-                return severity
+        """
+        Determine severity level from risk score
+
+        Scores outside every threshold range (above 100, negative, or in a
+        gap such as 39.5) are 'info'.
+        """
+        i = bisect.bisect_left(self._SEVERITY_CUTOFFS, risk_score)
+        if i < len(self._SEVERITY_CUTOFFS) and self._SEVERITY_FLOORS[i] <= risk_score:
+            return self._SEVERITY_LABELS[i]
         return 'info'
 
     def should_send_immediately(self, alert: Alert) -> bool:
@@ -140,14 +262,19 @@ class SmartAlertManager:
     def is_duplicate(self, alert: Alert, time_window_minutes: int = 10) -> bool:
         """Check if alert is a duplicate within time window"""
         key = (alert.source_ip, alert.server, alert.threat_type)
-        now = datetime.now()
+        now = time.monotonic()
+        window = time_window_minutes * 60
+
+        # Forget keys that have left the window, oldest first
+        while self.seen_events and now - next(iter(self.seen_events.values())) >= window:
+            self.seen_events.popitem(last=False)
 
         if key in self.seen_events:
-            last_seen = self.seen_events[key]
-            if (now - last_seen).total_seconds() < time_window_minutes * 60:
-                return True
+            return True
 
         self.seen_events[key] = now
+        if len(self.seen_events) > MAX_SEEN_EVENTS:
+            self.seen_events.popitem(last=False)
         return False
 
     def add_alert(self, event: Dict, guardian_result: Dict):
@@ -186,107 +313,143 @@ class SmartAlertManager:
             self.pending_alerts.append(alert)
             self.stats['alerts_batched'] += 1
 
+            # Send the batch early rather than let it grow unbounded until the next interval
+            if alert.severity in ('high', 'medium'):
+                self._unbatched += 1
+                if self._unbatched == BATCH_FLUSH_THRESHOLD:
+                    self._wakeup.set()
+
             # Track attack campaigns
             campaign_key = (alert.source_ip, alert.server)
-            self.attack_campaigns[campaign_key].append(alert)
+            campaign = self.attack_campaigns.get(campaign_key)
+            if campaign is None:
+                campaign = self.attack_campaigns[campaign_key] = deque(maxlen=CAMPAIGN_MAX_ALERTS)
+            campaign.append(alert)
 
     def _send_immediate_alert(self, alert: Alert):
         """Send immediate critical/high alert"""
-        emoji_map = {
-            'critical': '🚨',
-            'high': '⚠️',
-            'medium': '⚡',
-            'low': '🔍',
-            'info': 'ℹ️'
-        }
-
-        emoji = emoji_map.get(alert.severity, '⚠️')
+        header = _IMMEDIATE_HEADERS.get(alert.severity)
+        if header is None:
+            header = f"⚠️ *{alert.severity.upper()} SECURITY ALERT*"
 
         # Escape special Markdown characters to avoid parsing errors
-        def escape_md(text):
-            """Escape special characters for Telegram Markdown"""
-            if not text:
-                return text
-            special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-            for char in special_chars:
-                text = str(text).replace(char, f'\\{char}')
-            return text
-
-        message = f"{emoji} *{alert.severity.upper()} SECURITY ALERT*\n\n"
-        message += f"*Threat:* {escape_md(alert.threat_type)}\n"
-        message += f"*Risk Score:* {alert.risk_score}/100\n\n"
-        message += f"*Attacker:* {alert.source_ip}\n"  # IPs are safe, no need to escape
-        message += f"*Target:* {escape_md(alert.server)}\n"
-        message += f"*User:* {escape_md(alert.username)}\n"
-        message += f"*Location:* {escape_md(alert.details.get('country', 'Unknown'))}\n\n"
+        lines = [
+            header,
+            "",
+            f"*Threat:* {escape_md(alert.threat_type)}",
+            f"*Risk Score:* {alert.risk_score}/100",
+            "",
+            f"*Attacker:* {alert.source_ip}",  # IPs are safe, no need to escape
+            f"*Target:* {escape_md(alert.server)}",
+            f"*User:* {escape_md(alert.username)}",
+            f"*Location:* {escape_md(alert.details.get('country', 'Unknown'))}",
+            ""
+        ]
 
         if alert.details.get('actions'):
-            message += "*Recommended Actions:*\n"
-            for action in alert.details['actions'][:3]:
-                message += f"• {escape_md(action)}\n"
+            lines.append("*Recommended Actions:*")
+            lines.extend(f"• {escape_md(action)}" for action in alert.details['actions'][:3])
 
-        message += f"\n🕐 {alert.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+        lines.append("")
+        lines.append(f"🕐 {alert.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
 
-        self._send_telegram_message(message)
+        self._queue_message("\n".join(lines), urgent=True)
 
     def _process_pending_alerts(self):
         """Background thread to process pending alerts"""
-        while True:
+        while not self._shutdown.is_set():
             try:
-                time.sleep(30)  # Check every 30 seconds
+                # Sleep until the next batch/digest is due, or until woken early
+                with self.lock:
+                    next_run = min(self._last_batch_mono + BATCH_INTERVAL_SECONDS,
+                                   self._last_digest_mono + DIGEST_INTERVAL_SECONDS)
+                timeout = max(0.0, next_run - time.monotonic())
+                woken = self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                if self._shutdown.is_set():
+                    return
 
                 with self.lock:
-                    now = datetime.now()
+                    now = time.monotonic()
 
-                    # Send batched alerts every 15 minutes for medium severity
-                    if (now - self.last_batch_time).total_seconds() >= 900:  # 15 min
+                    # Send batched alerts every 15 minutes (or early, once enough are pending)
+                    if woken or now - self._last_batch_mono >= BATCH_INTERVAL_SECONDS:
                         self._send_batch_alert()
-                        self.last_batch_time = now
+                        self._last_batch_mono = now
 
                     # Send digest every hour
-                    if (now - self.last_digest_time).total_seconds() >= 3600:  # 1 hour
+                    if now - self._last_digest_mono >= DIGEST_INTERVAL_SECONDS:
+                        wall_now = datetime.now()
                         self._send_digest_alert()
-                        self.last_digest_time = now
+                        self._prune_campaigns(wall_now)
+                        self.last_digest_time = wall_now
+                        self._last_digest_mono = now
 
             except Exception as e:
                 logger.error(f"Error in alert processor: {e}")
+                self._shutdown.wait(30)
+
+    def _prune_campaigns(self, now: datetime):
+        """Forget campaigns with no alerts within CAMPAIGN_IDLE_TIMEOUT"""
+        idle = [
+            key for key, campaign in self.attack_campaigns.items()
+            if now - campaign[-1].timestamp >= CAMPAIGN_IDLE_TIMEOUT
+        ]
+        for key in idle:
+            del self.attack_campaigns[key]
 
     def _send_batch_alert(self):
         """Send batched medium-priority alerts"""
         if not self.pending_alerts:
             return
 
-        # Group by severity
+        # Split off the medium/high alerts in one pass; the rest wait for the digest
         by_severity = defaultdict(list)
+        remaining = []
         for alert in self.pending_alerts:
-            by_severity[alert.severity].append(alert)
+            if alert.severity in ('high', 'medium'):
+                by_severity[alert.severity].append(alert)
+            else:
+                remaining.append(alert)
 
         # Send medium/high batches
         for severity in ['high', 'medium']:
             alerts = by_severity.get(severity, [])
             if alerts:
-                message = f"⚡ *{severity.upper()} PRIORITY BATCH ALERT*\n\n"
-                message += f"*{len(alerts)} threats detected in last 15 minutes*\n\n"
-
-                # Group by IP
-                by_ip = defaultdict(list)
-                for alert in alerts:
-                    by_ip[alert.source_ip].append(alert)
-
-                # Top 5 attackers
-                top_attackers = sorted(by_ip.items(), key=lambda x: len(x[1]), reverse=True)[:5]
-
-                for ip, ip_alerts in top_attackers:
-                    message += f"📍 `{ip}` - {len(ip_alerts)} attempts\n"
-                    message += f"   Servers: {', '.join(set(a.server for a in ip_alerts[:3]))}\n"
-
-                message += f"\n📊 Use dashboard for full details"
-
-                self._send_telegram_message(message)
-
-                # Remove sent alerts
-                alert_ids = set(id(a) for a in alerts)
-                self.pending_alerts = [a for a in self.pending_alerts if id(a) not in alert_ids]
+                self._queue_message(self._format_batch(severity, alerts))
+
+        self.pending_alerts = remaining
+        self._unbatched = 0
+
+    @staticmethod
+    def _format_batch(severity: str, alerts: List[Alert]) -> str:
+        """Build the batch alert message for one severity"""
+        lines = [
+            _BATCH_HEADERS[severity],
+            "",
+            f"*{len(alerts)} threats detected in last 15 minutes*",
+            ""
+        ]
+
+        # Group by IP: attempt count and distinct servers in first-seen order
+        by_ip = {}
+        for alert in alerts:
+            info = by_ip.get(alert.source_ip)
+            if info is None:
+                info = by_ip[alert.source_ip] = {'count': 0, 'servers': {}}
+            info['count'] += 1
+            info['servers'][alert.server] = None
+
+        # Top 5 attackers
+        top_attackers = heapq.nlargest(5, by_ip.items(), key=lambda x: x[1]['count'])
+
+        for ip, info in top_attackers:
+            lines.append(f"📍 `{ip}` - {info['count']} attempts")
+            lines.append(f"   Servers: {', '.join(itertools.islice(info['servers'], 3))}")
+
+        lines.append("")
+        lines.append("📊 Use dashboard for full details")
+        return "\n".join(lines)
 
     def _send_digest_alert(self):
         """Send hourly digest of low-priority alerts"""
@@ -307,77 +470,172 @@ class SmartAlertManager:
             digest.by_threat_type[alert.threat_type] += 1
 
         # Top attackers
-        ip_counts = defaultdict(int)
-        for alert in self.pending_alerts:
-            ip_counts[alert.source_ip] += 1
-        digest.top_attackers = sorted(ip_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        ip_counts = Counter(alert.source_ip for alert in self.pending_alerts)
+        digest.top_attackers = ip_counts.most_common(5)
 
         # Build message
-        message = f"📊 *HOURLY SECURITY DIGEST*\n\n"
-        message += f"Period: {digest.start_time.strftime('%H:%M')} - {digest.end_time.strftime('%H:%M')}\n\n"
-        message += f"*Summary:*\n"
-        message += f"• Total Events: {digest.total_events}\n"
-        message += f"• Unique IPs: {len(digest.unique_ips)}\n"
-        message += f"• Servers Targeted: {len(digest.unique_servers)}\n\n"
+        lines = [
+            "📊 *HOURLY SECURITY DIGEST*",
+            "",
+            f"Period: {digest.start_time.strftime('%H:%M')} - {digest.end_time.strftime('%H:%M')}",
+            "",
+            "*Summary:*",
+            f"• Total Events: {digest.total_events}",
+            f"• Unique IPs: {len(digest.unique_ips)}",
+            f"• Servers Targeted: {len(digest.unique_servers)}",
+            ""
+        ]
 
         if digest.by_severity:
-            message += "*By Severity:*\n"
+            lines.append("*By Severity:*")
             for sev in ['medium', 'low', 'info']:
                 if sev in digest.by_severity:
-                    message += f"• {sev.title()}: {digest.by_severity[sev]}\n"
-            message += "\n"
+                    lines.append(f"• {sev.title()}: {digest.by_severity[sev]}")
+            lines.append("")
 
         if digest.top_attackers:
-            message += "*Top Attackers:*\n"
-            for ip, count in digest.top_attackers:
-                message += f"• `{ip}` - {count} attempts\n"
+            lines.append("*Top Attackers:*")
+            lines.extend(f"• `{ip}` - {count} attempts" for ip, count in digest.top_attackers)
 
-        message += f"\n🔗 View dashboard for details"
+        lines.append("")
+        lines.append("🔗 View dashboard for details")
 
-        self._send_telegram_message(message)
+        self._queue_message("\n".join(lines))
 
         # Clear pending alerts
         self.pending_alerts.clear()
+        self._unbatched = 0
 
     def send_daily_summary(self, stats: Dict):
         """Send daily summary with analytics"""
-        message = f"📈 *DAILY SECURITY SUMMARY*\n\n"
-        message += f"Date: {datetime.now().strftime('%Y-%m-%d')}\n\n"
-
-        message += f"*Events Processed:* {stats.get('total_events', 0):,}\n"
-        message += f"*Threats Detected:* {stats.get('threats_detected', 0):,}\n"
-        message += f"*IPs Blocked:* {stats.get('ips_blocked', 0)}\n"
-        message += f"*Successful Logins:* {stats.get('successful_logins', 0):,}\n"
-        message += f"*Failed Attempts:* {stats.get('failed_attempts', 0):,}\n\n"
+        lines = [
+            "📈 *DAILY SECURITY SUMMARY*",
+            "",
+            f"Date: {datetime.now().strftime('%Y-%m-%d')}",
+            "",
+            f"*Events Processed:* {stats.get('total_events', 0):,}",
+            f"*Threats Detected:* {stats.get('threats_detected', 0):,}",
+            f"*IPs Blocked:* {stats.get('ips_blocked', 0)}",
+            f"*Successful Logins:* {stats.get('successful_logins', 0):,}",
+            f"*Failed Attempts:* {stats.get('failed_attempts', 0):,}",
+            ""
+        ]
 
         if stats.get('top_threat_types'):
-            message += "*Top Threat Types:*\n"
-            for threat, count in stats['top_threat_types'][:5]:
-                message += f"• {threat}: {count}\n"
-            message += "\n"
+            lines.append("*Top Threat Types:*")
+            lines.extend(f"• {threat}: {count}" for threat, count in stats['top_threat_types'][:5])
+            lines.append("")
 
         if stats.get('top_countries'):
-            message += "*Attack Sources:*\n"
-            for country, count in stats['top_countries'][:5]:
-                message += f"• {country}: {count}\n"
+            lines.append("*Attack Sources:*")
+            lines.extend(f"• {country}: {count}" for country, count in stats['top_countries'][:5])
+
+        lines.append("")
+        lines.append("📊 System Health: ✅ Operational")
+        lines.append("🔗 Access dashboard for detailed analytics")
+
+        self._queue_message("\n".join(lines))
+
+    def _queue_message(self, message: str, urgent: bool = False):
+        """Queue a message for the Telegram sender thread"""
+        self._out_queue.put((0 if urgent else 1, next(self._out_sequence), message))
+
+    def _next_post(self) -> Optional[str]:
+        """
+        Wait for the next queued message and coalesce whatever else is waiting
 
-        message += f"\n📊 System Health: ✅ Operational"
-        message += f"\n🔗 Access dashboard for detailed analytics"
+        Returns:
+            Text of the next post, or None once close() has been called
+        """
+        _, _, message = self._out_queue.get()
+        if message is None:
+            return None  # Queued by close(), after everything else
+        parts = [message]
+        size = len(message)
 
-        self._send_telegram_message(message)
+        # Add whatever else is already waiting, up to the size limit
+        while True:
+            try:
+                item = self._out_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[2] is None or size + len(MESSAGE_SEPARATOR) + len(item[2]) > TELEGRAM_BATCH_CHARS:
+                self._out_queue.put(item)  # Starts the next post
+                break
+            parts.append(item[2])
+            size += len(MESSAGE_SEPARATOR) + len(item[2])
+
+        return MESSAGE_SEPARATOR.join(parts)
+
+    def _telegram_sender(self):
+        """Background thread that coalesces queued messages into as few posts as possible"""
+        while True:
+            try:
+                post = self._next_post()
+                if post is None:
+                    return
+                self._send_telegram_message(post)
+
+            except Exception as e:
+                logger.error(f"Error in Telegram sender: {e}")
+
+    def _async_telegram_sender(self):
+        """
+        Background thread like _telegram_sender, posting through httpx
+
+        Waits for the next post, takes up to TELEGRAM_MAX_IN_FLIGHT posts
+        that are ready together, and sends them concurrently on a private
+        event loop within Telegram's rate limit.
+        """
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=TELEGRAM_MAX_IN_FLIGHT),
+            headers={'Content-Type': 'application/json'},
+            timeout=10
+        )
+        rate_limit = TokenBucket(TELEGRAM_RATE_PER_SECOND, TELEGRAM_RATE_PER_SECOND)
+        try:
+            closing = False
+            while not closing:
+                try:
+                    posts = [self._next_post()]
+                    while len(posts) < TELEGRAM_MAX_IN_FLIGHT and not self._out_queue.empty():
+                        posts.append(self._next_post())
+                    if None in posts:
+                        closing = True
+                        posts = posts[:posts.index(None)]
+                    loop.run_until_complete(self._send_posts_async(client, rate_limit, posts))
+
+                except Exception as e:
+                    logger.error(f"Error in Telegram sender: {e}")
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.close()
+
+    async def _send_posts_async(self, client, rate_limit: TokenBucket, posts: List[str]):
+        """Send posts concurrently, waiting for rate limit tokens between starts"""
+        sends = []
+        for post in posts:
+            while not rate_limit.available():
+                await asyncio.sleep(rate_limit.wait_time())
+            rate_limit.consume()
+            sends.append(asyncio.ensure_future(self._send_telegram_message_async(client, post)))
+        await asyncio.gather(*sends)
+
+    def _telegram_payload(self, message: str) -> bytes:
+        """sendMessage request body for a message, encoded as JSON"""
+        return serialization.dumps({
+            'chat_id': self.chat_id,
+            'text': message,
+            'parse_mode': 'Markdown',
+            'disable_web_page_preview': True
+        })
 
     def _send_telegram_message(self, message: str):
         """Send message to Telegram"""
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-            payload = {
-                'chat_id': self.chat_id,
-                'text': message,
-                'parse_mode': 'Markdown',
-                'disable_web_page_preview': True
-            }
-
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._session.post(self._send_url, data=self._telegram_payload(message), timeout=10)
             if response.status_code == 200:
                 self.stats['total_messages_sent'] += 1
                 logger.info(f"Telegram alert sent successfully")
@@ -387,15 +645,65 @@ class SmartAlertManager:
         except Exception as e:
             logger.error(f"Telegram error: {e}")
 
+    async def _send_telegram_message_async(self, client, message: str):
+        """Async variant of _send_telegram_message, with the same retries as its session"""
+        try:
+            for attempt in range(4):
+                response = await client.post(self._send_url, content=self._telegram_payload(message))
+                if response.status_code not in (429, 502, 503) or attempt == 3:
+                    break
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+            if response.status_code == 200:
+                self.stats['total_messages_sent'] += 1
+                logger.info("Telegram alert sent successfully")
+            else:
+                logger.error(f"Telegram send failed: {response.status_code} - {response.text}")
+
+        except Exception as e:
+            logger.error(f"Telegram error: {e}")
+
+    def close(self, timeout: float = 10):
+        """
+        Stop the background threads
+
+        Alerts waiting for their batch are sent now, and messages already
+        queued are still sent before the sender exits. Registered with
+        atexit, so it also runs when the owner never calls it.
+
+        Args:
+            timeout: Max seconds to wait for each thread
+        """
+        if self._shutdown.is_set():
+            return
+        atexit.unregister(self.close)
+
+        self._shutdown.set()
+        self._wakeup.set()
+        if self.enable_smart_grouping:
+            self.processor_thread.join(timeout)
+            with self.lock:
+                self._send_batch_alert()
+        self._out_queue.put((2, next(self._out_sequence), None))
+        self.sender_thread.join(timeout)
+        if self._session is not None:
+            self._session.close()
+
     def get_statistics(self) -> Dict:
-        """Get alert statistics"""
-        with self.lock:
-            return {
-                'total_alerts_generated': self.stats['total_alerts_generated'],
-                'total_messages_sent': self.stats['total_messages_sent'],
-                'alerts_batched': self.stats['alerts_batched'],
-                'alerts_deduplicated': self.stats['alerts_deduplicated'],
-                'pending_alerts': len(self.pending_alerts),
-                'active_campaigns': len(self.attack_campaigns),
-                'compression_ratio': f"{self.stats['total_messages_sent']}/{self.stats['total_alerts_generated']}" if self.stats['total_alerts_generated'] > 0 else "0/0"
-            }
+        """
+        Get alert statistics
+
+        Reads a snapshot without taking the lock, so polling never blocks
+        add_alert; counters are only written by add_alert (under the lock)
+        and the sender thread, so the values are at most a moment stale.
+        """
+        stats = self.stats.copy()
+        return {
+            'total_alerts_generated': stats['total_alerts_generated'],
+            'total_messages_sent': stats['total_messages_sent'],
+            'alerts_batched': stats['alerts_batched'],
+            'alerts_deduplicated': stats['alerts_deduplicated'],
+            'pending_alerts': len(self.pending_alerts),
+            'active_campaigns': len(self.attack_campaigns),
+            'compression_ratio': f"{stats['total_messages_sent']}/{stats['total_alerts_generated']}" if stats['total_alerts_generated'] > 0 else "0/0"
+        }
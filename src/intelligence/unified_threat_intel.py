@@ -4,13 +4,112 @@ Combines local threat feeds with third-party API intelligence
 Provides seamless fallback when APIs are unavailable
 """
 
+import copy
+import ipaddress
 import logging
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Set, Optional, Any
+from typing import Dict, List, Set, Optional, Any, Tuple
+
+import numpy as np
+
 from .api_clients import ThreatIntelligenceAggregator
 
 logger = logging.getLogger(__name__)
 
+# (network, mask) pairs for the private and loopback IPv4 ranges
+_PRIVATE_RANGES = tuple(
+    (int(network.network_address), int(network.netmask))
+    for network in map(ipaddress.IPv4Network, (
+        '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '127.0.0.0/8'
+    ))
+)
+
+# Risk added and detail reported for a match in each local feed; other
+# feeds get DEFAULT_FEED_RISK and "Threat Feed: <name>"
+_FEED_META = {
+    'feodo_ips': (40, "Feodo Tracker - Known Botnet"),
+    'ssh_attackers': (35, "SSH Attacker - Brute Force Source"),
+    'tor_exits': (25, "Tor Exit Node")
+}
+DEFAULT_FEED_RISK = 30
+
+# Reputation results are reused for this many seconds, for up to this many (ip, use_apis) keys
+REPUTATION_MEMO_TTL = 300
+REPUTATION_MEMO_SIZE = 10000
+
+# check_ip_reputation_legacy never had a Tor entry
+_LEGACY_FEED_META = {
+    feed_name: meta for feed_name, meta in _FEED_META.items() if feed_name != 'tor_exits'
+}
+
+
+def _pack_ipv4(ip: str) -> Optional[int]:
+    """IPv4 address as a 32-bit int, or None if ip is not one"""
+    try:
+        return struct.unpack('!I', socket.inet_aton(ip))[0]
+    except (OSError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _is_private_ipv4(ip: str) -> bool:
+    """Check if ip is an IPv4 address in a private or loopback range"""
+    ip_int = _pack_ipv4(ip)
+    if ip_int is None:
+        return False
+    return any(ip_int & mask == network for network, mask in _PRIVATE_RANGES)
+
+
+def _load_feed(feed_path: Path) -> np.ndarray:
+    """
+    Read a feed file (one IPv4 address per line, '#' comments) in one pass
+
+    Addresses are packed straight into one bytes buffer and converted to a
+    sorted, unique uint32 array; lines that are not addresses are skipped.
+    """
+    with open(feed_path, 'rb') as f:
+        lines = f.read().decode('utf-8', 'replace').splitlines()
+
+    packed = bytearray()
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            try:
+                packed += socket.inet_aton(line)
+            except (OSError, ValueError):
+                continue
+    return np.unique(np.frombuffer(bytes(packed), dtype='>u4').astype(np.uint32))
+
+
+def _pack_ipv4_batch(ips: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """IPv4 addresses as a uint32 array, plus a mask of which entries were valid"""
+    packed = [_pack_ipv4(ip) for ip in ips]
+    valid = np.fromiter((ip is not None for ip in packed), dtype=bool, count=len(packed))
+    addresses = np.fromiter((ip or 0 for ip in packed), dtype=np.uint32, count=len(packed))
+    return addresses, valid
+
+
+def _is_private_ipv4_batch(addresses: np.ndarray) -> np.ndarray:
+    """Vectorized _is_private_ipv4 over packed addresses"""
+    private = np.zeros(addresses.shape, dtype=bool)
+    for network, mask in _PRIVATE_RANGES:
+        private |= (addresses & np.uint32(mask)) == np.uint32(network)
+    return private
+
+
+def _feed_hits(feed: np.ndarray, addresses: np.ndarray) -> np.ndarray:
+    """Mask of which packed addresses appear in a sorted feed array"""
+    if not feed.size:
+        return np.zeros(addresses.shape, dtype=bool)
+    index = np.minimum(feed.searchsorted(addresses), feed.size - 1)
+    return feed[index] == addresses
+
 
 class UnifiedThreatIntelligence:
     """
@@ -30,7 +129,12 @@ class UnifiedThreatIntelligence:
             api_config: Dict with API keys (virustotal_api_key, abuseipdb_api_key, shodan_api_key)
         """
         self.threat_feeds_dir = threat_feeds_dir
-        self.local_feeds = {}
+        self.local_feeds = {}  # feed name -> sorted, unique np.uint32 array of IPv4 addresses
+
+        # Recent results, so bursts of events from one IP are checked once:
+        # {(ip, use_apis): (expires_at_monotonic, result)}
+        self._reputation_memo = OrderedDict()
+        self._reputation_memo_lock = threading.Lock()
 
         # Initialize API aggregator if keys are provided
         has_api_keys = any(api_config.values())
@@ -60,8 +164,7 @@ class UnifiedThreatIntelligence:
             feed_path = self.threat_feeds_dir / filename
             if feed_path.exists():
                 try:
-                    with open(feed_path, 'r') as f:
-                        ips = set(line.strip() for line in f if line.strip() and not line.startswith('#'))
+                    ips = _load_feed(feed_path)
                     self.local_feeds[feed_name] = ips
                     logger.info(f"Loaded {len(ips)} IPs from {feed_name}")
                 except Exception as e:
@@ -80,10 +183,102 @@ class UnifiedThreatIntelligence:
         Returns:
             Dict with comprehensive reputation data
         """
-        # Initialize result structure
-        result = {
+        return self.check_ips_batch([ip_address], use_apis)[0]
+
+    def check_ips_batch(self, ip_addresses: List[str], use_apis: bool = True) -> List[Dict[str, Any]]:
+        """
+        Check the reputation of many IPs at once
+
+        Private-range and local feed checks run vectorized over the whole
+        batch, and the public IPs go to the APIs together.
+
+        Args:
+            ip_addresses: IPs to check
+            use_apis: Whether to use third-party APIs (True) or local feeds only (False)
+
+        Returns:
+            One check_ip_reputation() result per IP, in input order
+        """
+        results = [self._get_memoized((ip, use_apis)) for ip in ip_addresses]
+        misses = [ip for ip, result in zip(ip_addresses, results) if result is None]
+        if misses:
+            checked = iter(self._check_ips(misses, use_apis))
+            results = [next(checked) if result is None else result for result in results]
+
+        # Deep copies: callers keep and edit results (nested indicator lists
+        # and source dicts included) without touching the memoized ones
+        return [copy.deepcopy(result) for result in results]
+
+    def _check_ips(self, ip_addresses: List[str], use_apis: bool) -> List[Dict[str, Any]]:
+        """check_ips_batch() without the memo; memoizes what it computes"""
+        addresses, valid = _pack_ipv4_batch(ip_addresses)
+        private = _is_private_ipv4_batch(addresses) & valid
+        private |= np.fromiter(
+            (ip == 'localhost' for ip in ip_addresses), dtype=bool, count=len(ip_addresses)
+        )
+        hits = [
+            (feed_name, _feed_hits(ips, addresses) & valid)
+            for feed_name, ips in self.local_feeds.items()
+        ]
+
+        public = [
+            ip for ip, is_private in zip(ip_addresses, private) if not is_private
+        ]
+        api_results = {}
+        if use_apis and self.api_aggregator and public:
+            api_results = self._query_apis(public)
+
+        results = []
+        for i, ip_address in enumerate(ip_addresses):
+            local_feeds = self._local_feed_result([feed_name for feed_name, hit in hits if hit[i]])
+            if private[i]:
+                results.append(self._private_result(ip_address, local_feeds))
+            else:
+                results.append(self._combine_results(ip_address, local_feeds, api_results.get(ip_address)))
+
+        # A result missing its requested API data is retried next time
+        api_wanted = use_apis and self.api_aggregator is not None
+        with self._reputation_memo_lock:
+            expires_at = time.monotonic() + REPUTATION_MEMO_TTL
+            for ip_address, result, is_private in zip(ip_addresses, results, private):
+                if api_wanted and not is_private and result['api_intelligence'] is None:
+                    continue
+                key = (ip_address, use_apis)
+                self._reputation_memo[key] = (expires_at, result)
+                self._reputation_memo.move_to_end(key)
+            while len(self._reputation_memo) > REPUTATION_MEMO_SIZE:
+                self._reputation_memo.popitem(last=False)
+        return results
+
+    def _get_memoized(self, key: Tuple[str, bool]) -> Optional[Dict[str, Any]]:
+        """Recent reputation result for an (ip, use_apis) key, or None"""
+        with self._reputation_memo_lock:
+            entry = self._reputation_memo.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._reputation_memo[key]
+                return None
+            self._reputation_memo.move_to_end(key)
+            return entry[1]
+
+    def _query_apis(self, ip_addresses: List[str]) -> Dict[str, Dict]:
+        """Aggregated API results by IP (empty if the lookup failed)"""
+        try:
+            if len(ip_addresses) == 1:
+                return {ip_addresses[0]: self.api_aggregator.analyze_ip(ip_addresses[0])}
+            return self.api_aggregator.sweep_ips(ip_addresses)
+        except Exception as e:
+            target = ip_addresses[0] if len(ip_addresses) == 1 else f"{len(ip_addresses)} IPs"
+            logger.error(f"API intelligence failed for {target}: {e}")
+            return {}
+
+    @staticmethod
+    def _new_result(ip_address: str, local_feeds: Dict[str, Any]) -> Dict[str, Any]:
+        """Empty reputation result for an IP"""
+        return {
             'ip': ip_address,
-            'local_feeds': self._check_local_feeds(ip_address),
+            'local_feeds': local_feeds,
             'api_intelligence': None,
             'combined_score': 0,
             'is_malicious': False,
@@ -93,25 +288,29 @@ class UnifiedThreatIntelligence:
             'recommendations': []
         }
 
-        # Check if private IP
-        if self._is_private_ip(ip_address):
-            result['combined_score'] = 5
-            result['threat_level'] = 'clean'
-            result['detailed_threats'] = ['Private IP - Local Network']
-            result['is_malicious'] = False
-            return result
+    def _private_result(self, ip_address: str, local_feeds: Dict[str, Any]) -> Dict[str, Any]:
+        """Reputation result for a private/local IP"""
+        result = self._new_result(ip_address, local_feeds)
+        result['combined_score'] = 5
+        result['threat_level'] = 'clean'
+        result['detailed_threats'] = ['Private IP - Local Network']
+        result['is_malicious'] = False
+        return result
+
+    def _combine_results(self, ip_address: str, local_feeds: Dict[str, Any],
+                         api_result: Optional[Dict]) -> Dict[str, Any]:
+        """Combine local feed and API results for a public IP into its reputation"""
+        result = self._new_result(ip_address, local_feeds)
 
         # Process local feed results
-        local_score = result['local_feeds']['risk_score']
+        local_score = local_feeds['risk_score']
         result['combined_score'] = local_score
-        result['is_malicious'] = result['local_feeds']['is_malicious']
-        result['threat_types'].extend(result['local_feeds']['threat_types'])
-        result['detailed_threats'].extend(result['local_feeds']['detailed_threats'])
+        result['is_malicious'] = local_feeds['is_malicious']
+        result['threat_types'].extend(local_feeds['threat_types'])
+        result['detailed_threats'].extend(local_feeds['detailed_threats'])
 
-        # Query APIs if available and requested
-        if use_apis and self.api_aggregator:
+        if api_result is not None:
             try:
-                api_result = self.api_aggregator.analyze_ip(ip_address)
                 result['api_intelligence'] = api_result
 
                 # Combine scores (weighted average favoring API data if available)
@@ -168,8 +367,9 @@ class UnifiedThreatIntelligence:
 
         return result
 
-    def _check_local_feeds(self, ip_address: str) -> Dict[str, Any]:
-        """Check IP against local threat feeds"""
+    @staticmethod
+    def _local_feed_result(feeds_matched: List[str]) -> Dict[str, Any]:
+        """Local feed verdict for an IP found in the given feeds"""
         result = {
             'is_malicious': False,
             'risk_score': 20,  # Base score for external IPs
@@ -178,37 +378,17 @@ class UnifiedThreatIntelligence:
             'feeds_matched': []
         }
 
-        # Check against each feed
-        for feed_name, ips in self.local_feeds.items():
-            if ip_address in ips:
-                result['is_malicious'] = True
-                result['threat_types'].append(feed_name)
-                result['feeds_matched'].append(feed_name)
-
-                # Add risk score based on feed type
-                if feed_name == 'feodo_ips':
-                    result['detailed_threats'].append("Feodo Tracker - Known Botnet")
-                    result['risk_score'] += 40
-                elif feed_name == 'ssh_attackers':
-                    result['detailed_threats'].append("SSH Attacker - Brute Force Source")
-                    result['risk_score'] += 35
-                elif feed_name == 'tor_exits':
-                    result['detailed_threats'].append("Tor Exit Node")
-                    result['risk_score'] += 25
-                else:
-                    result['detailed_threats'].append(f"Threat Feed: {feed_name}")
-                    result['risk_score'] += 30
+        for feed_name in feeds_matched:
+            result['is_malicious'] = True
+            result['threat_types'].append(feed_name)
+            result['feeds_matched'].append(feed_name)
 
-        return result
+            # Add risk score based on feed type
+            risk, detail = _FEED_META.get(feed_name, (DEFAULT_FEED_RISK, f"Threat Feed: {feed_name}"))
+            result['detailed_threats'].append(detail)
+            result['risk_score'] += risk
 
-    def _is_private_ip(self, ip: str) -> bool:
-        """Check if IP is private/local"""
-        return ip.startswith((
-            '192.168.', '10.', '172.16.', '172.17.', '172.18.', '172.19.',
-            '172.20.', '172.21.', '172.22.', '172.23.', '172.24.', '172.25.',
-            '172.26.', '172.27.', '172.28.', '172.29.', '172.30.', '172.31.',
-            '127.', 'localhost'
-        ))
+        return result
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get statistics about threat intelligence sources"""
@@ -244,9 +424,7 @@ def check_ip_reputation_legacy(ip: str, threat_feeds_cache: Dict[str, Set[str]])
     }
 
     # Check for private/local IPs first
-    if ip.startswith(('192.168.', '10.', '172.16.', '172.17.', '172.18.', '172.19.',
-                     '172.20.', '172.21.', '172.22.', '172.23.', '172.24.', '172.25.',
-                     '172.26.', '172.27.', '172.28.', '172.29.', '172.30.', '172.31.', '127.')):
+    if _is_private_ipv4(ip):
         reputation['detailed_threats'] = ["Private IP - Low Risk"]
         reputation['risk_score'] = 5
         return reputation
@@ -257,15 +435,11 @@ def check_ip_reputation_legacy(ip: str, threat_feeds_cache: Dict[str, Set[str]])
             reputation['is_malicious'] = True
             reputation['threat_types'].append(feed_name)
 
-            if feed_name == 'feodo_ips':
-                reputation['detailed_threats'].append("Feodo Tracker - Known Botnet")
-                reputation['risk_score'] += 40
-            elif feed_name == 'ssh_attackers':
-                reputation['detailed_threats'].append("SSH Attacker - Brute Force Source")
-                reputation['risk_score'] += 35
-            else:
-                reputation['detailed_threats'].append(f"Threat Feed: {feed_name}")
-                reputation['risk_score'] += 30
+            risk, detail = _LEGACY_FEED_META.get(
+                feed_name, (DEFAULT_FEED_RISK, f"Threat Feed: {feed_name}")
+            )
+            reputation['detailed_threats'].append(detail)
+            reputation['risk_score'] += risk
 
     # If no threats found, it's clean
     if not reputation['detailed_threats']:
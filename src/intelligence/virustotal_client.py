@@ -4,9 +4,12 @@ Provides IP reputation and threat intelligence from VirusTotal
 """
 
 import logging
-from typing import Dict, Optional
+import time
+from collections import deque
+from typing import Dict, List, Optional
 from pathlib import Path
-from .base_client import BaseIntelligenceClient
+from .base_client import BaseIntelligenceClient, error_text
+from .cache import IntelligenceCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +22,8 @@ class VirusTotalClient(BaseIntelligenceClient):
     API docs: https://developers.virustotal.com/reference/ip-info
     """
 
-    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600):
+    def __init__(self, api_key: str, cache_dir: Path, cache_ttl: int = 3600,
+                 cache: Optional[IntelligenceCache] = None, debug: bool = False):
         """
         Initialize VirusTotal client
 
@@ -27,10 +31,16 @@ class VirusTotalClient(BaseIntelligenceClient):
             api_key: VirusTotal API key
             cache_dir: Directory for caching responses
             cache_ttl: Cache time-to-live in seconds (default: 1 hour)
+            cache: Shared cache to use instead of one in cache_dir
+            debug: Include the raw API response in parse errors
         """
-        super().__init__(api_key, cache_dir, cache_ttl)
+        super().__init__(api_key, cache_dir, cache_ttl, cache=cache)
         self.base_url = "https://www.virustotal.com/api/v3"
-        self.min_request_interval = 15.0  # 4 req/min = 15 sec between requests
+        self.debug = debug
+        self.min_request_interval = 15.0  # 4 req/min = 15 sec between requests (average)
+        self.requests_per_minute = 4
+        self._request_slots = deque(maxlen=self.requests_per_minute)  # Last reserved send times
+        self._session.headers.update({"x-apikey": api_key})  # Sent on every pooled request
         logger.info("VirusTotal client initialized")
 
     def lookup(self, ip_address: str, use_cache: bool = True) -> Dict:
@@ -44,7 +54,7 @@ class VirusTotalClient(BaseIntelligenceClient):
         Returns:
             Dictionary with VirusTotal analysis results
         """
-        cache_key = f"vt_{ip_address}"
+        cache_key = self._lookup_cache_key(ip_address)
 
         # Check cache first
         if use_cache:
@@ -53,29 +63,115 @@ class VirusTotalClient(BaseIntelligenceClient):
                 return cached
 
         # Make API request
-        url = f"{self.base_url}/ip_addresses/{ip_address}"
-        headers = {
+        response = self._make_request(self._ip_url(ip_address))
+        return self._handle_ip_response(response, cache_key, use_cache)
+
+    def lookup_many(self, ip_addresses: List[str], max_workers: int = 4,
+                    use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        Look up many IP addresses, answering cached ones without any request
+
+        Cache hits are read in one pass; the misses are fetched concurrently,
+        up to requests_per_minute at once, so a batch of N uncached IPs takes
+        about a minute per requests_per_minute IPs rather than 15s per IP.
+
+        Args:
+            ip_addresses: IP addresses to query
+            max_workers: Number of concurrent requests
+            use_cache: Whether to use cached data
+
+        Returns:
+            Dictionary mapping each IP address to its VirusTotal analysis
+        """
+        unique_ips = list(dict.fromkeys(ip_addresses))
+        results = self.get_cached_many(unique_ips) if use_cache else {}
+
+        misses = [ip for ip in unique_ips if ip not in results]
+        if misses:
+            results.update(super().lookup_many(misses, max_workers=max_workers, use_cache=use_cache))
+
+        return {ip: results[ip] for ip in unique_ips}
+
+    def _reserve_request_slot(self) -> float:
+        """
+        Reserve the next free request slot in the sliding one-minute window
+
+        Up to requests_per_minute requests go out at once; the next one waits
+        until the oldest of them is a minute old, instead of spacing every
+        request min_request_interval apart.
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        with self._rate_lock:
+            current_time = time.monotonic()
+            slot = current_time
+            if len(self._request_slots) == self._request_slots.maxlen:
+                slot = max(current_time, self._request_slots[0] + 60.0)
+            self._request_slots.append(slot)
+            self.last_request_time = slot
+
+        return slot - current_time
+
+    async def lookup_async(self, ip_address: str, use_cache: bool = True) -> Dict:
+        """
+        Async variant of lookup(), for overlapping with other intel services
+
+        Args:
+            ip_address: IP address to query
+            use_cache: Whether to use cached data
+
+        Returns:
+            Dictionary with VirusTotal analysis results
+        """
+        cache_key = self._lookup_cache_key(ip_address)
+
+        if use_cache:
+            cached = self._get_cached(cache_key)
+            if cached:
+                return cached
+
+        response = await self._make_request_async(
+            self._ip_url(ip_address), headers=self._headers()
+        )
+        return self._handle_ip_response(response, cache_key, use_cache)
+
+    def _lookup_cache_key(self, ip_address: str) -> str:
+        """Cache key of a lookup() result"""
+        return f"vt_{ip_address}"
+
+    def _ip_url(self, ip_address: str) -> str:
+        """URL of the /ip_addresses report for an IP"""
+        return f"{self.base_url}/ip_addresses/{ip_address}"
+
+    def _headers(self) -> Dict:
+        """Authentication headers for async requests (the sync session already sends them)"""
+        return {
             "x-apikey": self.api_key,
             "Accept": "application/json"
         }
 
-        response = self._make_request(url, headers=headers)
-
+    def _handle_ip_response(self, response: Dict, cache_key: str, use_cache: bool) -> Dict:
+        """Parse and cache an IP report response, or return its error information"""
         if response and not response.get('error'):
             result = self._parse_response(response)
 
-            # Cache successful response
+            # Cache successful response; a parse error only as briefly as other errors
             if use_cache:
-                self._save_cache(cache_key, result)
+                ttl = self.negative_cache_ttl if result.get('error') else None
+                self._save_cache(cache_key, result, ttl=ttl)
 
             return result
         else:
             # Return error information
-            return {
+            error = {
                 'error': response.get('error', 'Unknown error'),
                 'status_code': response.get('status_code'),
                 'service': 'virustotal'
             }
+            if use_cache:
+                self._save_error(cache_key, error)
+            return error
 
     def _parse_response(self, response: Dict) -> Dict:
         """
@@ -155,12 +251,14 @@ class VirusTotalClient(BaseIntelligenceClient):
             return parsed
 
         except Exception as e:
-            logger.error(f"Error parsing VirusTotal response: {e}")
-            return {
-                'error': f'Parse error: {str(e)}',
-                'service': 'virustotal',
-                'raw_response': response
+            logger.error(f"Error parsing VirusTotal response: {error_text(e)}")
+            error = {
+                'error': f'Parse error: {error_text(e)}',
+                'service': 'virustotal'
             }
+            if self.debug:
+                error['raw_response'] = response
+            return error
 
     def get_ip_comments(self, ip_address: str) -> Dict:
         """
@@ -173,12 +271,7 @@ class VirusTotalClient(BaseIntelligenceClient):
             Dictionary with comments
         """
         url = f"{self.base_url}/ip_addresses/{ip_address}/comments"
-        headers = {
-            "x-apikey": self.api_key,
-            "Accept": "application/json"
-        }
-
-        response = self._make_request(url, headers=headers)
+        response = self._make_request(url)
 
         if response and not response.get('error'):
             comments = []
@@ -209,12 +302,7 @@ class VirusTotalClient(BaseIntelligenceClient):
             Dictionary with vote counts
         """
         url = f"{self.base_url}/ip_addresses/{ip_address}/votes"
-        headers = {
-            "x-apikey": self.api_key,
-            "Accept": "application/json"
-        }
-
-        response = self._make_request(url, headers=headers)
+        response = self._make_request(url)
 
         if response and not response.get('error'):
             data = response.get('data', [])
@@ -242,13 +330,9 @@ class VirusTotalClient(BaseIntelligenceClient):
             Dictionary with related domains
         """
         url = f"{self.base_url}/ip_addresses/{ip_address}/resolutions"
-        headers = {
-            "x-apikey": self.api_key,
-            "Accept": "application/json"
-        }
         params = {'limit': limit}
 
-        response = self._make_request(url, headers=headers, params=params)
+        response = self._make_request(url, params=params)
 
         if response and not response.get('error'):
             domains = []
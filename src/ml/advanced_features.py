@@ -7,12 +7,20 @@ Designed for real-time analysis and thesis evaluation
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
 from math import radians, cos, sin, asin, sqrt
 import json
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional: JIT-compiled haversine
+    njit = None
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_KM = 6371
+
 
 class SessionTracker:
     """
@@ -102,6 +110,41 @@ class SessionTracker:
             logger.debug(f"Cleaned up old sessions: {len(ips_to_remove)} IPs")
 
 
+def _hav_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance in kilometers between two points given in degrees"""
+    # Convert to radians
+    lat1 = radians(lat1)
+    lon1 = radians(lon1)
+    lat2 = radians(lat2)
+    lon2 = radians(lon2)
+
+    # Haversine formula
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+
+    return c * EARTH_RADIUS_KM
+
+
+if njit is not None:
+    # Native straight-line float code for the per-event path (compiled once, cached on disk)
+    _hav_km = njit(cache=True, fastmath=True)(_hav_km)
+
+
+def haversine_distance_batch(lats1, lons1, lats2, lons2) -> np.ndarray:
+    """
+    Vectorized great circle distance in kilometers between point arrays
+
+    Args are array-likes of degrees, broadcast against each other.
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(v, dtype=np.float64)) for v in (lats1, lons1, lats2, lons2)
+    )
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
 class ImpossibleTravelDetector:
     """
     Detects impossible travel patterns
@@ -114,24 +157,15 @@ class ImpossibleTravelDetector:
     def __init__(self):
         self.user_locations = defaultdict(list)  # {username: [(timestamp, lat, lon, ip)]}
 
+        if njit is not None:
+            _hav_km(0.0, 0.0, 0.0, 0.0)  # Compile now rather than on the first login
+
     def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calculate great circle distance between two points in kilometers
-        Using Haversine formula
+        Using Haversine formula (JIT-compiled when numba is installed)
         """
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-
-        # Radius of earth in kilometers
-        r = 6371
-
-        return c * r
+        return _hav_km(float(lat1), float(lon1), float(lat2), float(lon2))
 
     def check_impossible_travel(self, username: str, timestamp: datetime,
                                latitude: float, longitude: float, ip: str) -> Dict:
@@ -215,6 +249,71 @@ class ImpossibleTravelDetector:
 
         return result
 
+    def check_impossible_travel_batch(self, usernames: List[str], timestamps: List[datetime],
+                                      latitudes, longitudes,
+                                      ips: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        check_impossible_travel() for many logins at once, e.g. replayed logs
+
+        Logins are taken in the given order; each is compared with the same
+        user's previous login (earlier in the batch or already recorded), and
+        all distances and speeds are computed in one vectorized pass.
+
+        Returns:
+            Dict of per-login columns: has_previous, is_impossible,
+            distance_km, time_diff_hours, required_speed_kmh, risk_score
+            (numbers are unrounded; rows without a previous login are 0)
+        """
+        n = len(usernames)
+        ips = ips if ips is not None else [None] * n
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lons = np.asarray(longitudes, dtype=np.float64)
+
+        # Previous login of each row's user
+        prev_lats = np.zeros(n)
+        prev_lons = np.zeros(n)
+        time_diff_seconds = np.zeros(n)
+        has_previous = np.zeros(n, dtype=bool)
+        last_seen = {}
+        for i, (username, timestamp) in enumerate(zip(usernames, timestamps)):
+            if username in last_seen:
+                prev_timestamp, prev_lats[i], prev_lons[i] = last_seen[username]
+                has_previous[i] = True
+            elif self.user_locations.get(username):
+                prev_timestamp, prev_lats[i], prev_lons[i], _ = self.user_locations[username][-1]
+                has_previous[i] = True
+            if has_previous[i]:
+                time_diff_seconds[i] = (timestamp - prev_timestamp).total_seconds()
+            last_seen[username] = (timestamp, lats[i], lons[i])
+
+        distance_km = haversine_distance_batch(prev_lats, prev_lons, lats, lons)
+        time_diff_hours = np.maximum(time_diff_seconds / 3600, 0.01)  # Avoid division by zero
+        required_speed_kmh = distance_km / time_diff_hours
+
+        is_impossible = has_previous & (required_speed_kmh > self.MAX_TRAVEL_SPEED_KMH)
+        impossible_score = np.minimum(100, np.floor(50 + required_speed_kmh / self.MAX_TRAVEL_SPEED_KMH * 30))
+        fast_score = np.where(required_speed_kmh > 500, np.minimum(50, np.floor(required_speed_kmh / 20)), 0)
+        risk_score = np.where(is_impossible, impossible_score, fast_score)
+
+        # Store these locations, keeping only the last 10 per user
+        for username, timestamp, latitude, longitude, ip in zip(usernames, timestamps, latitudes, longitudes, ips):
+            self.user_locations[username].append((timestamp, latitude, longitude, ip))
+        for username in last_seen:
+            if len(self.user_locations[username]) > 10:
+                self.user_locations[username] = self.user_locations[username][-10:]
+
+        if is_impossible.any():
+            logger.warning(f"Impossible travel detected in {int(is_impossible.sum())} of {n} logins")
+
+        return {
+            'has_previous': has_previous,
+            'is_impossible': is_impossible,
+            'distance_km': np.where(has_previous, distance_km, 0),
+            'time_diff_hours': np.where(has_previous, time_diff_hours, 0),
+            'required_speed_kmh': np.where(has_previous, required_speed_kmh, 0),
+            'risk_score': np.where(has_previous, risk_score, 0).astype(np.int64)
+        }
+
 
 class BehavioralPatternAnalyzer:
     """
@@ -223,8 +322,30 @@ class BehavioralPatternAnalyzer:
 
     def __init__(self, lookback_window_hours: int = 24):
         self.lookback_window = timedelta(hours=lookback_window_hours)
-        self.ip_history = defaultdict(list)  # {ip: [events]}
-        self.user_history = defaultdict(list)  # {username: [events]}
+        self.ip_history = defaultdict(deque)  # {ip: deque of events, oldest first}
+        self.user_history = defaultdict(deque)  # {username: deque of events, oldest first}
+
+        # Running totals over each history, kept in step with the deques
+        self.ip_stats = defaultdict(self._new_stats)  # {ip: stats}
+        self.user_stats = defaultdict(self._new_stats)  # {username: stats}
+
+    @staticmethod
+    def _new_stats() -> Dict:
+        """Empty running totals for one IP or user"""
+        return {'success': 0, 'users': Counter(), 'ips': Counter(), 'servers': Counter()}
+
+    @staticmethod
+    def _update_stats(stats: Dict, event_record: Dict, delta: int):
+        """Add (delta=1) or remove (delta=-1) one event from running totals"""
+        stats['success'] += delta * event_record['success']
+        for field, counter in (('username', stats['users']), ('ip', stats['ips']),
+                               ('server', stats['servers'])):
+            value = event_record[field]
+            if not value:
+                continue
+            counter[value] += delta
+            if not counter[value]:
+                del counter[value]
 
     def record_event(self, event: Dict):
         """Record an event for pattern analysis"""
@@ -246,23 +367,30 @@ class BehavioralPatternAnalyzer:
 
         self.ip_history[ip].append(event_record)
         self.user_history[username].append(event_record)
+        self._update_stats(self.ip_stats[ip], event_record, 1)
+        self._update_stats(self.user_stats[username], event_record, 1)
 
         # Keep history manageable
         self._cleanup_old_events(ip, username, timestamp)
 
     def _cleanup_old_events(self, ip: str, username: str, current_time: datetime):
-        """Remove events outside lookback window"""
+        """
+        Remove events outside lookback window
+
+        Events are recorded in log order, so expired ones sit at the left of
+        each deque and are popped without rebuilding the whole history.
+        """
         cutoff_time = current_time - self.lookback_window
 
         # Clean IP history
-        self.ip_history[ip] = [
-            e for e in self.ip_history[ip] if e['timestamp'] > cutoff_time
-        ]
+        events, stats = self.ip_history[ip], self.ip_stats[ip]
+        while events and events[0]['timestamp'] <= cutoff_time:
+            self._update_stats(stats, events.popleft(), -1)
 
         # Clean user history
-        self.user_history[username] = [
-            e for e in self.user_history[username] if e['timestamp'] > cutoff_time
-        ]
+        events, stats = self.user_history[username], self.user_stats[username]
+        while events and events[0]['timestamp'] <= cutoff_time:
+            self._update_stats(stats, events.popleft(), -1)
 
     def analyze_ip_behavior(self, ip: str, current_time: datetime) -> Dict:
         """Analyze IP's behavioral patterns"""
@@ -283,13 +411,14 @@ class BehavioralPatternAnalyzer:
             }
 
         # Calculate metrics
+        stats = self.ip_stats[ip]
         total_attempts = len(events)
-        successful = sum(1 for e in events if e['success'])
+        successful = stats['success']
         failed = total_attempts - successful
         success_rate = successful / total_attempts if total_attempts > 0 else 0
 
-        unique_users = len(set(e['username'] for e in events if e['username']))
-        unique_servers = len(set(e['server'] for e in events if e['server']))
+        unique_users = len(stats['users'])
+        unique_servers = len(stats['servers'])
 
         # Calculate velocity
         if events:
@@ -341,12 +470,13 @@ class BehavioralPatternAnalyzer:
                 'risk_score': 100  # Unknown user = suspicious
             }
 
+        stats = self.user_stats[username]
         total_logins = len(events)
-        successful = sum(1 for e in events if e['success'])
+        successful = stats['success']
         success_rate = successful / total_logins if total_logins > 0 else 0
 
-        unique_ips = len(set(e['ip'] for e in events if e['ip']))
-        unique_servers = len(set(e['server'] for e in events if e['server']))
+        unique_ips = len(stats['ips'])
+        unique_servers = len(stats['servers'])
 
         # Determine if legitimate
         # Legitimate users typically have:
@@ -167,10 +167,10 @@ def test_api_integration():
     print("=" * 80)
 
     # Show cache statistics
-    cache_files = list(cache_dir.glob("*.json")) if cache_dir.exists() else []
+    cache_stats = aggregator.cache.get_stats()
     print(f"\n📁 Cache Statistics:")
-    print(f"   Location: {cache_dir}")
-    print(f"   Cached Results: {len(cache_files)}")
+    print(f"   Location: {cache_stats['cache_db']}")
+    print(f"   Cached Results: {cache_stats['cache_entries']}")
     print(f"   Note: Results are cached for 24 hours to minimize API usage")
 
     print("\n" + "=" * 80)
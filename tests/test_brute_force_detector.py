@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test that the engine's low-traffic fast path returns the same result as
+the full detection path
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.detection.brute_force_detector import BruteForceDetectionEngine
+
+
+def make_events():
+    """Four IPs failing against one server, two attempts each"""
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    events = []
+    for i in range(8):
+        events.append({
+            'timestamp': start + timedelta(seconds=10 * i),
+            'source_ip': f'203.0.113.{i % 4 + 1}',
+            'username': ['root', 'admin', 'oracle', 'test'][i % 4],
+            'event_type': 'failed_password',
+            'server_hostname': 'web-1'
+        })
+    return events
+
+
+def run_engine(low_traffic_attempts):
+    engine = BruteForceDetectionEngine()
+    engine.LOW_TRAFFIC_ATTEMPTS = low_traffic_attempts
+    return [engine.analyze_event(event).to_dict() for event in make_events()]
+
+
+def key_sets(result):
+    """Top-level keys plus the keys of every detector's dict"""
+    strategies = result['detection_strategies']
+    return sorted(result), {name: sorted(value) for name, value in strategies.items()}
+
+
+def test_fast_path_matches_full_path():
+    """Every fast-path result equals the full path's, keys and values"""
+    fast = run_engine(BruteForceDetectionEngine.LOW_TRAFFIC_ATTEMPTS)
+    full = run_engine(0)  # Never takes the fast path
+
+    for fast_result, full_result in zip(fast, full):
+        assert key_sets(fast_result) == key_sets(full_result)
+        assert fast_result == full_result
+
+
+def test_fast_path_counts_other_ips():
+    """Distributed counts include other IPs attacking the same server"""
+    # The fourth event is still below the distributed threshold
+    fourth = run_engine(BruteForceDetectionEngine.LOW_TRAFFIC_ATTEMPTS)[3]
+    distributed = fourth['detection_strategies']['distributed']
+
+    assert distributed['unique_ips'] == 4
+    assert distributed['total_attempts'] == 4
+
+
+if __name__ == "__main__":
+    test_fast_path_matches_full_path()
+    test_fast_path_counts_other_ips()
+    print("✅ Brute force detector tests passed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test that APIRateLimiter never grants more than its quota in any window
+Runs on a fake clock, so no real time passes
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.intelligence import api_clients
+from src.intelligence.api_clients import APIRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def run_limiter(requests_per_day, requests_per_minute, steps, max_wait):
+    """Request at random moments, returning the send time of every grant"""
+    clock = FakeClock()
+    saved_time = api_clients.time
+    api_clients.time = clock
+    try:
+        limiter = APIRateLimiter(requests_per_day, requests_per_minute)
+        rng = random.Random(requests_per_day * 1000 + requests_per_minute)
+        grants = []
+        for _ in range(steps):
+            clock.now += rng.choice([0, 0, 0.5, 3, 15, 61, 3600])
+            wait = limiter._reserve(max_wait)
+            if wait is not None:
+                grants.append(clock.now + wait)
+        return grants
+    finally:
+        api_clients.time = saved_time
+
+
+def max_in_window(grants, period):
+    """Most grants falling within any half-open span [t, t + period)"""
+    grants = sorted(grants)
+    best = start = 0
+    for end, grant in enumerate(grants):
+        while grant - grants[start] >= period:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def test_minute_quota_holds_in_every_window():
+    """VirusTotal-style 4/min never gets a fifth grant within 60s"""
+    for max_wait in (0.0, 20.0, 120.0):
+        grants = run_limiter(250, 4, 2000, max_wait)
+        assert grants
+        assert max_in_window(grants, 60) <= 4, max_wait
+
+
+def test_daily_quota_holds_in_every_window():
+    """The daily quota is not exceeded by a full burst plus refill"""
+    grants = run_limiter(250, 60, 20000, 0.0)
+    assert max_in_window(grants, 86400) <= 250
+    assert len(grants) > 250  # Quota frees up again once a day has passed
+
+
+def test_try_acquire_stops_at_quota():
+    """A burst gets exactly the per-minute quota"""
+    limiter = APIRateLimiter(250, 4)
+    granted = [limiter.try_acquire() for _ in range(10)]
+    assert granted == [True] * 4 + [False] * 6
+
+
+if __name__ == "__main__":
+    test_minute_quota_holds_in_every_window()
+    test_daily_quota_holds_in_every_window()
+    test_try_acquire_stops_at_quota()
+    print("✅ Rate limiter tests passed")
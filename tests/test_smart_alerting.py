@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test that SmartAlertManager delivers queued Telegram messages on close()
+Telegram is never contacted: posts are captured from the manager's session
+(or from a fake httpx.AsyncClient for the async sender)
+"""
+
+import sys
+import json
+import time
+import asyncio
+import types
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from src.intelligence import smart_alerting
+from src.intelligence.smart_alerting import SmartAlertManager
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.text = 'ok'
+
+
+class FakeAsyncClient:
+    """Stands in for httpx.AsyncClient, answering 429 to chosen messages once"""
+
+    def __init__(self, log, throttled, **kwargs):
+        self.log = log
+        self.throttled = throttled
+        self.in_flight = 0
+
+    async def post(self, url, content=None, **kwargs):
+        text = json.loads(content)['text']
+        self.log['starts'].append((time.monotonic(), text))
+        self.in_flight += 1
+        self.log['max_in_flight'] = max(self.log['max_in_flight'], self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        if text in self.throttled:
+            self.throttled.discard(text)
+            return FakeResponse(429)
+        return FakeResponse()
+
+    async def aclose(self):
+        pass
+
+
+def make_manager(posts, enable_smart_grouping=False):
+    """Manager on the requests sender whose posts are appended to posts"""
+    saved_httpx = smart_alerting.httpx
+    smart_alerting.httpx = None  # Use the requests-based sender thread
+    try:
+        manager = SmartAlertManager('test-token', 'test-chat',
+                                    enable_smart_grouping=enable_smart_grouping)
+    finally:
+        smart_alerting.httpx = saved_httpx
+
+    def post(url, data=None, timeout=None, **kwargs):
+        posts.append(json.loads(data)['text'])
+        return FakeResponse()
+
+    manager._session.post = post
+    return manager
+
+
+def test_async_sender_paces_and_retries():
+    """The httpx sender keeps to the rate limit and concurrency cap and retries a 429"""
+    log = {'starts': [], 'max_in_flight': 0}
+    # Each message is too long to share a post, so every message is one post
+    messages = [f'{i:02d}' + 'x' * 2000 for i in range(40)]
+    throttled = {messages[-1]}
+
+    saved_httpx = smart_alerting.httpx
+    smart_alerting.httpx = types.SimpleNamespace(
+        AsyncClient=lambda **kwargs: FakeAsyncClient(log, throttled, **kwargs),
+        Limits=lambda **kwargs: None
+    )
+    try:
+        manager = SmartAlertManager('test-token', 'test-chat', enable_smart_grouping=False)
+        assert manager._session is None
+        for message in messages:
+            manager._queue_message(message)
+        manager.close(timeout=30)
+    finally:
+        smart_alerting.httpx = saved_httpx
+
+    texts = [text for _, text in log['starts']]
+    assert sorted(set(texts)) == messages
+    assert texts.count(messages[-1]) == 2  # Retried after the 429
+    assert manager.get_statistics()['total_messages_sent'] == 40
+    assert log['max_in_flight'] <= smart_alerting.TELEGRAM_MAX_IN_FLIGHT
+
+    # The bucket allows a burst of 30, then 30 per second
+    first_starts = sorted(min(t for t, text in log['starts'] if text == m) for m in messages)
+    rate = smart_alerting.TELEGRAM_RATE_PER_SECOND
+    assert first_starts[-1] - first_starts[0] >= (len(messages) - rate) / rate * 0.9
+
+
+def test_queued_message_delivered_on_close():
+    """A queued daily summary is sent before close() returns"""
+    posts = []
+    manager = make_manager(posts)
+
+    manager.send_daily_summary({'total_events': 1234, 'threats_detected': 5})
+    manager.close()
+
+    assert len(posts) == 1
+    assert 'DAILY SECURITY SUMMARY' in posts[0]
+    assert manager.get_statistics()['total_messages_sent'] == 1
+
+
+def test_batched_alerts_flushed_on_close():
+    """Alerts still waiting for their batch are sent by close()"""
+    posts = []
+    manager = make_manager(posts, enable_smart_grouping=True)
+
+    event = {'source_ip': '203.0.113.7', 'username': 'root', 'server_hostname': 'web-1'}
+    manager.add_alert(event, {'threat_detected': 'brute_force', 'overall_risk_score': 65})
+    manager.close()
+
+    assert any('203.0.113.7' in post for post in posts)
+
+
+def test_get_severity_edges():
+    """Scores outside every threshold range fall back to 'info'"""
+    posts = []
+    manager = make_manager(posts)
+    try:
+        expected = {
+            0: 'info', 39: 'info', 40: 'low', 59: 'low', 60: 'medium', 74: 'medium',
+            75: 'high', 89: 'high', 90: 'critical', 100: 'critical',
+            39.5: 'info', 74.5: 'info', 101: 'info', -1: 'info'
+        }
+        for score, severity in expected.items():
+            assert manager.get_severity(score) == severity, (score, severity)
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    test_queued_message_delivered_on_close()
+    test_batched_alerts_flushed_on_close()
+    test_get_severity_edges()
+    test_async_sender_paces_and_retries()
+    print("✅ Smart alerting tests passed")